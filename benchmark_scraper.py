@@ -0,0 +1,367 @@
+#!/usr/bin/env python3
+"""
+Scraper Benchmark
+Records a corpus of blog HTML and replays the full pipeline against it from a
+local HTTP server, reporting throughput, per-stage latency and peak memory as JSON
+"""
+
+import argparse
+import contextlib
+import copy
+import http.server
+import json
+import math
+import os
+import platform
+import resource
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+from collections import defaultdict
+from datetime import datetime
+
+from statsig_blog_scraper import PARSER_BACKENDS, MarkdownRenderer, PostRecord, StatsigBlogScraper
+
+STAGES = ['fetch', 'parse', 'categorize', 'summarize', 'render']
+
+
+def record_corpus(corpus_dir, max_posts=None, base_url="https://statsig.com"):
+    """Save the /blog/all index and post pages to `corpus_dir`"""
+    scraper = StatsigBlogScraper(base_url=base_url)
+    os.makedirs(os.path.join(corpus_dir, 'posts'), exist_ok=True)
+
+    response = scraper.transport.get(f"{base_url}/blog/all")
+    with open(os.path.join(corpus_dir, 'index.html'), 'wb') as f:
+        f.write(response.content)
+
+    posts = scraper.fetch_all_posts()
+    if max_posts:
+        posts = posts[:max_posts]
+    for i, post in enumerate(posts, 1):
+        print(f"Recording {i}/{len(posts)}: {post['slug']}")
+        response = scraper.fetch_post_page(post['url'])
+        with open(corpus_path(corpus_dir, post['slug']), 'wb') as f:
+            f.write(response.content)
+
+    with open(os.path.join(corpus_dir, 'manifest.json'), 'w', encoding='utf-8') as f:
+        json.dump({'base_url': base_url, 'recorded': datetime.now().isoformat(),
+                   'posts': [post['slug'] for post in posts]}, f, indent=2)
+    print(f"✓ Recorded {len(posts)} posts to {corpus_dir}")
+
+
+def corpus_path(corpus_dir, slug):
+    """Map a /blog/<slug> path to the file that stores it"""
+    if slug == '/blog/all':
+        return os.path.join(corpus_dir, 'index.html')
+    return os.path.join(corpus_dir, 'posts', slug.rsplit('/', 1)[-1] + '.html')
+
+
+def serve_corpus(corpus_dir):
+    """Serve a recorded corpus on a local port; returns (server, base_url)"""
+
+    class CorpusHandler(http.server.BaseHTTPRequestHandler):
+        def do_GET(self):
+            path = corpus_path(corpus_dir, self.path.split('?', 1)[0])
+            if not self.path.startswith('/blog/') or not os.path.exists(path):
+                self.send_error(404)
+                return
+            with open(path, 'rb') as f:
+                body = f.read()
+            self.send_response(200)
+            self.send_header('Content-Type', 'text/html; charset=utf-8')
+            self.send_header('Content-Length', str(len(body)))
+            self.end_headers()
+            self.wfile.write(body)
+
+        def log_message(self, *args):
+            pass
+
+    server = http.server.ThreadingHTTPServer(('127.0.0.1', 0), CorpusHandler)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return server, f"http://127.0.0.1:{server.server_address[1]}"
+
+
+def percentile(samples, pct):
+    """Nearest-rank percentile of a list of samples"""
+    if not samples:
+        return 0.0
+    ordered = sorted(samples)
+    rank = max(0, math.ceil(pct / 100 * len(ordered)) - 1)
+    return ordered[rank]
+
+
+def peak_rss_mb():
+    """Peak resident set size of this process in MB"""
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # ru_maxrss is reported in bytes on macOS and in kilobytes elsewhere
+    return peak / (1024 * 1024) if sys.platform == 'darwin' else peak / 1024
+
+
+def git_commit():
+    try:
+        return subprocess.check_output(['git', 'rev-parse', '--short', 'HEAD'],
+                                       cwd=os.path.dirname(os.path.abspath(__file__)),
+                                       stderr=subprocess.DEVNULL, text=True).strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def recorded_slugs(corpus_dir):
+    """Slugs of the posts saved in the corpus manifest, or None without a manifest"""
+    path = os.path.join(corpus_dir, 'manifest.json')
+    if not os.path.exists(path):
+        return None
+    with open(path, encoding='utf-8') as f:
+        return set(json.load(f)['posts'])
+
+
+def run_stages(scraper, slugs=None, max_posts=None):
+    """Run every pipeline stage sequentially, timing each one per post"""
+    timings = defaultdict(list)
+    posts = scraper.fetch_all_posts()
+    if slugs is not None:
+        posts = [post for post in posts if post['slug'] in slugs]
+    if max_posts:
+        posts = posts[:max_posts]
+
+    enriched = []
+    for post in posts:
+        start = time.perf_counter()
+        response = scraper.fetch_post_page(post['url'])
+        html = response.content
+        timings['fetch'].append(time.perf_counter() - start)
+
+        start = time.perf_counter()
+        content = scraper.parse_post_content(html)
+        timings['parse'].append(time.perf_counter() - start)
+        post.update(content)
+
+        start = time.perf_counter()
+        post['categories'] = scraper.categorize_post(post)
+        timings['categorize'].append(time.perf_counter() - start)
+
+        start = time.perf_counter()
+        post.update(scraper.summarize_post(post))
+        timings['summarize'].append(time.perf_counter() - start)
+        enriched.append(post)
+
+    categorized = defaultdict(list)
+    for post in enriched:
+        record = PostRecord.from_post(post)
+        for category in record.categories:
+            categorized[category].append(record)
+    start = time.perf_counter()
+    scraper.generate_markdown(categorized)
+    timings['render'].append(time.perf_counter() - start)
+    return len(enriched), timings
+
+
+def run_benchmark(corpus_dir, repeat=3, parser='html.parser', workers=4, max_posts=None, stream=False,
+                  cpu_workers=0):
+    """Benchmark the pipeline against a recorded corpus and return a result dict"""
+    slugs = recorded_slugs(corpus_dir)
+    if slugs is not None and (not max_posts or max_posts > len(slugs)):
+        # The index may link to more posts than were recorded
+        max_posts = len(slugs)
+    server, base_url = serve_corpus(corpus_dir)
+    # The scraper reports progress on stdout; keep it out of the JSON result
+    with open(os.devnull, 'w') as devnull, contextlib.redirect_stdout(devnull):
+        try:
+            stage_samples = defaultdict(list)
+            stage_totals = defaultdict(float)
+            post_count = 0
+            for _ in range(repeat):
+                scraper = StatsigBlogScraper(base_url=base_url, workers=1, requests_per_second=0, parser=parser)
+                post_count, timings = run_stages(scraper, slugs, max_posts)
+                for stage, samples in timings.items():
+                    stage_samples[stage].extend(samples)
+                    stage_totals[stage] += sum(samples)
+
+            # End-to-end run() with concurrent fetching, as the CLI does it
+            end_to_end = []
+            for _ in range(repeat):
+                scraper = StatsigBlogScraper(base_url=base_url, workers=workers, requests_per_second=0,
+                                             parser=parser, stream=stream, cpu_workers=cpu_workers)
+                with tempfile.TemporaryDirectory() as tmp:
+                    start = time.perf_counter()
+                    scraper.run(output_file=os.path.join(tmp, 'out.md'), max_posts=max_posts)
+                    end_to_end.append(time.perf_counter() - start)
+        finally:
+            server.shutdown()
+
+    stages = {}
+    for stage in STAGES:
+        samples = stage_samples.get(stage, [])
+        stages[stage] = {
+            'samples': len(samples),
+            'total_s': round(stage_totals[stage] / repeat, 6),
+            'p50_ms': round(percentile(samples, 50) * 1000, 3),
+            'p95_ms': round(percentile(samples, 95) * 1000, 3),
+        }
+    pipeline_s = sum(stage['total_s'] for stage in stages.values())
+    best_end_to_end = min(end_to_end)
+    return {
+        'commit': git_commit(),
+        'timestamp': datetime.now().isoformat(timespec='seconds'),
+        'python': platform.python_version(),
+        'parser': parser,
+        'workers': workers,
+        'stream': stream,
+        'cpu_workers': cpu_workers,
+        'repeat': repeat,
+        'posts': post_count,
+        'throughput_posts_per_s': round(post_count / pipeline_s, 2) if pipeline_s else None,
+        'end_to_end_s': round(best_end_to_end, 4),
+        'end_to_end_posts_per_s': round(post_count / best_end_to_end, 2) if best_end_to_end else None,
+        'stages': stages,
+        'peak_rss_mb': round(peak_rss_mb(), 1),
+    }
+
+
+def scaled_categories(posts, scale=1):
+    """PostRecords by category, with every post repeated `scale` times under distinct URLs"""
+    records = [PostRecord.from_post(post) for post in posts]
+    categorized = defaultdict(list)
+    for n in range(scale):
+        for record in records:
+            if n:
+                record = copy.copy(record)
+                record.url = f"{record.url}?copy={n}"
+            for category in record.categories:
+                categorized[category].append(record)
+    return categorized
+
+
+def time_best(fn, repeat):
+    """Best wall time of `repeat` calls to `fn`, and its last result"""
+    best = None
+    for _ in range(repeat):
+        start = time.perf_counter()
+        result = fn()
+        elapsed = time.perf_counter() - start
+        best = elapsed if best is None else min(best, elapsed)
+    return best, result
+
+
+def render_benchmark(corpus_dir, repeat=5, scale=1, render_workers=(1, 4), parser='html.parser'):
+    """Time MarkdownRenderer against the reference renderer on a recorded corpus"""
+    slugs = recorded_slugs(corpus_dir)
+    server, base_url = serve_corpus(corpus_dir)
+    with open(os.devnull, 'w') as devnull, contextlib.redirect_stdout(devnull):
+        try:
+            scraper = StatsigBlogScraper(base_url=base_url, requests_per_second=0, parser=parser)
+            posts = scraper.fetch_all_posts()
+            if slugs is not None:
+                posts = [post for post in posts if post['slug'] in slugs]
+            enriched = list(scraper.iter_enriched_posts(posts))
+        finally:
+            server.shutdown()
+    categorized = scaled_categories(enriched, scale)
+
+    def stable(markdown):
+        # The two renderers may straddle a second boundary
+        return [line for line in markdown.split('\n') if not line.startswith(('*Generated:', '- **Last Updated**'))]
+
+    reference_s, reference = time_best(lambda: '\n'.join(scraper.iter_markdown_reference(categorized)), repeat)
+    renderers = {}
+    identical = True
+    for workers in render_workers:
+        elapsed, markdown = time_best(
+            lambda: '\n'.join(MarkdownRenderer(scraper, categorized, workers).iter_pieces()), repeat)
+        renderers[str(workers)] = {'best_s': round(elapsed, 6),
+                                   'speedup': round(reference_s / elapsed, 2) if elapsed else None}
+        identical = identical and stable(markdown) == stable(reference)
+    return {
+        'commit': git_commit(),
+        'timestamp': datetime.now().isoformat(timespec='seconds'),
+        'python': platform.python_version(),
+        'posts': len(enriched) * scale,
+        'categories': len(categorized),
+        'placements': sum(len(records) for records in categorized.values()),
+        'repeat': repeat,
+        'reference_s': round(reference_s, 6),
+        'renderer': renderers,
+        'identical': identical,
+        'output_mb': round(len(reference.encode('utf-8')) / 1e6, 2),
+    }
+
+
+def compare_results(old, new):
+    """Print the relative change between two benchmark result files"""
+    def change(before, after):
+        if not before:
+            return 'n/a'
+        return f"{(after - before) / before * 100:+.1f}%"
+
+    print(f"{'metric':<32}{'old':>12}{'new':>12}{'change':>10}")
+    rows = [('throughput_posts_per_s', old.get('throughput_posts_per_s'), new.get('throughput_posts_per_s')),
+            ('end_to_end_posts_per_s', old.get('end_to_end_posts_per_s'), new.get('end_to_end_posts_per_s')),
+            ('peak_rss_mb', old.get('peak_rss_mb'), new.get('peak_rss_mb'))]
+    for stage in STAGES:
+        for key in ('p50_ms', 'p95_ms'):
+            rows.append((f"{stage}.{key}", old['stages'].get(stage, {}).get(key),
+                         new['stages'].get(stage, {}).get(key)))
+    for name, before, after in rows:
+        if before is None or after is None:
+            continue
+        print(f"{name:<32}{before:>12}{after:>12}{change(before, after):>10}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Benchmark the Statsig blog scraper on a recorded corpus')
+    sub = parser.add_subparsers(dest='command', required=True)
+
+    rec = sub.add_parser('record', help='Record the live blog index and posts to a corpus directory')
+    rec.add_argument('corpus', help='Directory to write the corpus to')
+    rec.add_argument('-m', '--max-posts', type=int, help='Number of posts to record')
+    rec.add_argument('--base-url', default='https://statsig.com', help='Blog to record from')
+
+    run = sub.add_parser('run', help='Run the pipeline against a recorded corpus')
+    run.add_argument('corpus', help='Recorded corpus directory')
+    run.add_argument('-r', '--repeat', type=int, default=3, help='Number of timed iterations (default: 3)')
+    run.add_argument('-m', '--max-posts', type=int, help='Only benchmark the first N posts')
+    run.add_argument('-w', '--workers', type=int, default=4, help='Workers for the end-to-end run (default: 4)')
+    run.add_argument('--parser', choices=PARSER_BACKENDS, default='html.parser')
+    run.add_argument('--cpu-workers', type=int, default=0,
+                     help='CPU stage processes for the end-to-end run (default: 0)')
+    run.add_argument('--stream', action='store_true', help='Use streaming mode for the end-to-end run')
+    run.add_argument('-o', '--output', help='Write the JSON result to this file instead of stdout')
+
+    render = sub.add_parser('render', help='Compare the markdown renderer with the reference renderer')
+    render.add_argument('corpus', help='Recorded corpus directory')
+    render.add_argument('-r', '--repeat', type=int, default=5, help='Timed iterations, best is kept (default: 5)')
+    render.add_argument('--scale', type=int, default=1,
+                        help='Repeat every post this many times to simulate a larger blog (default: 1)')
+    render.add_argument('--render-workers', type=int, nargs='+', default=[1, 4],
+                        help='Render thread counts to time (default: 1 4)')
+    render.add_argument('--parser', choices=PARSER_BACKENDS, default='html.parser')
+
+    cmp = sub.add_parser('compare', help='Compare two benchmark result files')
+    cmp.add_argument('old')
+    cmp.add_argument('new')
+
+    args = parser.parse_args()
+    if args.command == 'record':
+        record_corpus(args.corpus, args.max_posts, args.base_url)
+    elif args.command == 'render':
+        print(json.dumps(render_benchmark(args.corpus, repeat=args.repeat, scale=args.scale,
+                                          render_workers=args.render_workers, parser=args.parser), indent=2))
+    elif args.command == 'run':
+        result = run_benchmark(args.corpus, repeat=args.repeat, parser=args.parser,
+                               workers=args.workers, max_posts=args.max_posts, stream=args.stream,
+                               cpu_workers=args.cpu_workers)
+        output = json.dumps(result, indent=2)
+        if args.output:
+            with open(args.output, 'w', encoding='utf-8') as f:
+                f.write(output + '\n')
+        else:
+            print(output)
+    else:
+        with open(args.old, encoding='utf-8') as f_old, open(args.new, encoding='utf-8') as f_new:
+            compare_results(json.load(f_old), json.load(f_new))
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,74 @@
+#!/usr/bin/env python3
+"""
+Parser parity check
+Verifies that the single-pass extractor produces byte-for-byte the same content
+as the reference multi-pass extractor on a saved corpus of blog pages
+"""
+
+import argparse
+import json
+import os
+import sqlite3
+import sys
+import time
+import zlib
+
+from bs4 import BeautifulSoup
+
+from statsig_blog_scraper import PARSER_BACKENDS, StatsigBlogScraper
+
+
+def iter_pages(paths, cache_path=None):
+    """Yield (name, html bytes) for every .html file under `paths` and every page in the cache"""
+    for path in paths:
+        if os.path.isdir(path):
+            for root, _, files in os.walk(path):
+                for name in sorted(files):
+                    if name.endswith('.html'):
+                        full = os.path.join(root, name)
+                        with open(full, 'rb') as f:
+                            yield full, f.read()
+        else:
+            with open(path, 'rb') as f:
+                yield path, f.read()
+    if cache_path:
+        conn = sqlite3.connect(cache_path)
+        for url, html in conn.execute('SELECT url, html FROM posts WHERE html IS NOT NULL ORDER BY url'):
+            yield url, zlib.decompress(html)
+        conn.close()
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Compare single-pass and multi-pass content extraction')
+    parser.add_argument('paths', nargs='*', help='HTML files or directories of saved pages')
+    parser.add_argument('--cache', metavar='PATH', help='Also check every page stored in a scraper cache')
+    parser.add_argument('--parser', choices=PARSER_BACKENDS, default='html.parser', help='Tree builder to use')
+    args = parser.parse_args()
+    if not args.paths and not args.cache:
+        parser.error('give at least one path or --cache')
+
+    scraper = StatsigBlogScraper(parser=args.parser)
+    checked = mismatches = 0
+    single_time = multi_time = 0.0
+    for name, html in iter_pages(args.paths, args.cache):
+        soup = BeautifulSoup(html, args.parser)
+        start = time.perf_counter()
+        single = scraper.extract_post_content(soup)
+        single_time += time.perf_counter() - start
+        start = time.perf_counter()
+        multi = scraper.extract_post_content_multipass(soup)
+        multi_time += time.perf_counter() - start
+
+        checked += 1
+        if json.dumps(single, sort_keys=True).encode() != json.dumps(multi, sort_keys=True).encode():
+            mismatches += 1
+            diff = [key for key in sorted(set(single) | set(multi)) if single.get(key) != multi.get(key)]
+            print(f"MISMATCH {name}: {', '.join(diff)}")
+
+    print(f"Checked {checked} pages with {args.parser}: {mismatches} mismatches")
+    print(f"Extraction time: single-pass {single_time:.3f}s, multi-pass {multi_time:.3f}s")
+    return 1 if mismatches else 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -4,207 +4,2939 @@ Statsig Blog Scraper & Analyzer
 Scrapes blog posts, categorizes them, and generates summaries in Markdown format
 """
 
-import requests
-from bs4 import BeautifulSoup
+import asyncio
+import bisect
+import contextlib
+import email.utils
+import hashlib
 import json
+import os
+import random
 import re
-from datetime import datetime
-from collections import defaultdict
-from urllib.parse import urljoin
+import sqlite3
+import sys
+import tempfile
+import threading
 import time
+import zlib
+from array import array
+from collections import Counter, defaultdict, deque
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
+from datetime import datetime, timezone
+from itertools import islice
+from urllib.parse import urljoin, urlparse
+from xml.etree import ElementTree
+
+import requests
+from bs4 import BeautifulSoup, FeatureNotFound, Tag
+from requests.adapters import HTTPAdapter
+
+try:
+    import httpx
+except ImportError:  # Optional: only needed for --http2 and --async
+    httpx = None
+
+try:
+    from opentelemetry import trace as otel_trace
+except ImportError:  # Optional: only needed for --otel
+    otel_trace = None
+
+try:
+    import numpy as np
+    import scipy.sparse as sp
+except ImportError:  # Optional: only needed for --summarizer tfidf/textrank and --related
+    np = sp = None
+
+try:
+    import pyarrow as pa
+    import pyarrow.parquet as pq
+except ImportError:  # Optional: only needed for --format parquet/arrow
+    pa = pq = None
+
+
+# BeautifulSoup tree builders accepted by --parser; lxml and html5lib are optional installs
+PARSER_BACKENDS = ('html.parser', 'lxml', 'html5lib')
+
+# Main content selectors, in priority order: tag names or [class*="fragment"]
+ARTICLE_SELECTORS = ['article', '[class*="blogContent"]', '[class*="blog-content"]',
+                     '[class*="post-content"]', '[class*="postContent"]', 'main']
+SELECTOR_TAG_RE = re.compile(r'^[a-z][a-z0-9]*$')
+SELECTOR_CLASS_RE = re.compile(r'^\[class\*=["\']([^"\']+)["\']\]$')
+DATE_CLASS_PATTERN = r'date|Date|published|Published'
+AUTHOR_CLASS_PATTERN = r'author|Author'
+TEXT_TAGS = frozenset(['p', 'h2', 'h3', 'h4', 'li'])
+FIRST_TAGS = frozenset(['script', 'h1', 'title', 'time', 'meta'])
+
+
+# Text analysis patterns, compiled once. Each extractor's pattern list is combined
+# into a single alternation so a sentence or line is scanned once per extractor.
+SENTENCE_SPLIT_RE = re.compile(r'(?<=[.!?])\s+')
+TRAILING_SPACE_RE = re.compile(r'\s+\n')
+BULLET_RE = re.compile(r'^(?:[\-\*•]|\d+\.)\s+')
+HEADER_PREFIX_RE = re.compile(r'^#+\s*')
+DATA_POINT_PATTERNS = [
+    r'\b(\d+)%\s+(increase|decrease|improvement|reduction|faster|slower|more|less)',
+    r'\b(\d+[,.]?\d*)\s*(million|billion|thousand|k|m|b)\s+(users|events|requests|experiments)',
+    r'\breduced?\s+by\s+(\d+)%',
+    r'\bimproved?\s+by\s+(\d+)%',
+    r'\b(\d+[,.]?\d*)\s*(ms|seconds?|minutes?|hours?)\s+(faster|slower|latency|response time)',
+    r'\bfrom\s+(\d+)\s+to\s+(\d+)',
+]
+EXAMPLE_PATTERNS = [
+    r'for example[,:]?',
+    r'for instance[,:]?',
+    r'such as[,:]?',
+    r'e\.g\.',
+    r'example:',
+    r'use case:',
+    r'case study:',
+]
+ACTION_PATTERNS = [
+    r'\bshould\b',
+    r'\bmust\b',
+    r'\brecommend\b',
+    r'\bbest practice\b',
+    r'\bimportant to\b',
+    r'\bkey is to\b',
+    r'\bmake sure\b',
+]
+DATA_POINT_RE = re.compile('|'.join(f'(?:{p})' for p in DATA_POINT_PATTERNS), re.IGNORECASE)
+EXAMPLE_RE = re.compile('|'.join(f'(?:{p})' for p in EXAMPLE_PATTERNS), re.IGNORECASE)
+ACTION_RE = re.compile('|'.join(f'(?:{p})' for p in ACTION_PATTERNS), re.IGNORECASE)
+# Patterns that summarize_post's output depends on; their fingerprint is part of the analysis memo key
+SUMMARY_PATTERNS = (SENTENCE_SPLIT_RE, TRAILING_SPACE_RE, BULLET_RE, HEADER_PREFIX_RE,
+                    DATA_POINT_RE, EXAMPLE_RE, ACTION_RE)
+
+
+# Category keyword taxonomy, see KeywordMatcher for the matching rules
+CATEGORY_KEYWORDS = {
+    'Engineering & Infrastructure': ['infrastructure', 'performance', 'optimization', 'memory', 'server', 'architecture', 'scaling', 'compute', 'gke', 'cloud', 'kubernetes'],
+    'A/B Testing & Experimentation': ['experiment', 'a/b test', 'testing', 'hypothesis', 'control', 'variant', 'statistical', 'p-value', 'multiple comparison'],
+    'AI & Machine Learning': ['ai', 'machine learning', 'llm', 'gpt', 'openai', 'artificial intelligence', 'model', 'ai-generated'],
+    'Product Analytics': ['analytics', 'metrics', 'measurement', 'tracking', 'data', 'insights', 'count distinct'],
+    'Feature Management': ['feature flag', 'feature gate', 'rollout', 'deployment', 'release'],
+    'Company Updates': ['announcement', 'acquisition', 'partnership', 'funding', 'team'],
+    'Case Studies & Success Stories': ['case study', 'customer', 'how we', 'lessons learned', 'story behind'],
+    'Product Development': ['product', 'development', 'building', 'design', 'user experience'],
+    'Data Engineering': ['warehouse', 'data pipeline', 'etl', 'data platform', 'fabric', 'microsoft'],
+    'Best Practices & Guides': ['guide', 'best practice', 'how to', 'tutorial', 'tips']
+}
+
+# Suggested questions listed under each category of the markdown output
+CATEGORY_PROMPTS = {
+    'A/B Testing & Experimentation': [
+        "What are the best practices for designing experiments with multiple variants?",
+        "How should I handle statistical significance and p-values in A/B tests?",
+        "What are common pitfalls in experimentation and how can I avoid them?",
+        "How do I design experiments to avoid multiple comparison problems?",
+    ],
+    'AI & Machine Learning': [
+        "What are best practices for implementing AI features with experimentation?",
+        "How can I measure and validate AI model performance in production?",
+        "What are considerations for A/B testing AI-generated content?",
+    ],
+    'Product Analytics': [
+        "What metrics should I track for [feature/product]?",
+        "How do I set up analytics to measure user engagement?",
+        "What are best practices for event tracking and data collection?",
+    ],
+    'Feature Management': [
+        "How should I implement feature flags for gradual rollouts?",
+        "What are best practices for feature flag lifecycle management?",
+        "How do I use feature gates to minimize deployment risk?",
+    ],
+    'Engineering & Infrastructure': [
+        "What are the performance optimization techniques used at scale?",
+        "How can I improve infrastructure efficiency and reduce costs?",
+        "What architecture patterns work best for high-traffic services?",
+    ],
+    'Case Studies & Success Stories': [
+        "What lessons from [company] case study apply to my situation?",
+        "How have other teams solved [specific challenge]?",
+        "What outcomes can I expect from implementing [approach]?",
+    ],
+    'Best Practices & Guides': [
+        "What is the recommended approach for [specific task]?",
+        "What are the key considerations when implementing [feature]?",
+        "How do I get started with [topic]?",
+    ],
+}
+
+
+# --summarizer modes: first-sentences heuristic, or corpus-level extractive scoring (see CorpusSummarizer)
+SUMMARIZERS = ('heuristic', 'tfidf', 'textrank')
+WORD_RE = re.compile(r"[a-z0-9]+(?:['’][a-z]+)?")
+STOPWORDS = frozenset("""
+a about above after again against all am an and any are as at be because been before being below between
+both but by can could did do does doing down during each few for from further had has have having he her
+here hers him his how i if in into is it its itself just me more most my no nor not now of off on once only
+or other our ours out over own same she should so some such than that the their them then there these they
+this those through to too under until up very was we were what when where which while who whom why will
+with would you your yours
+""".split())
+
+
+# What --dedup does with near-duplicate posts: mark them in the output or leave them out
+DEDUP_MODES = ('flag', 'collapse')
+
+
+# Post discovery sources: the /blog/all index (with pagination), sitemap.xml or an RSS/Atom feed
+DISCOVERY_METHODS = ('index', 'sitemap', 'feed')
+
+# --metadata modes: only read JSON-LD metadata, or read it first and skip unchanged posts
+METADATA_MODES = ('only', 'first')
+JSON_LD_OPEN_RE = re.compile(rb'<script\b[^>]*\btype\s*=\s*["\']?application/ld\+json[^>]*>', re.IGNORECASE)
+SCRIPT_CLOSE_RE = re.compile(rb'</script\s*>', re.IGNORECASE)
+
+
+class SiteProfile:
+    """Everything that ties the pipeline to one blog: where its posts are listed,
+    which links are posts, where the content sits on a post page, the keyword
+    taxonomy posts are categorized with and the questions suggested per category.
+
+    `link_pattern` is matched against the href of index page links and against the
+    path of sitemap and feed entries. `content_selectors` are tried in priority
+    order and may be tag names or `[class*="fragment"]`. `discovery`, `workers` and
+    `requests_per_second` override the crawl settings for this site when it is
+    crawled by SiteScheduler.
+    """
+
+    def __init__(self, name, base_url, title=None, index_urls=None, sitemap_url=None, feed_url=None,
+                 link_pattern=r'^/blog/(?!all$)[^/]+$', content_selectors=None,
+                 date_class=DATE_CLASS_PATTERN, author_class=AUTHOR_CLASS_PATTERN, category_keywords=None,
+                 category_prompts=None, discovery=None, workers=None, requests_per_second=None):
+        if discovery and discovery not in DISCOVERY_METHODS:
+            raise ValueError(f"Unknown discovery method {discovery!r} for site {name!r}; "
+                             f"choose from {', '.join(DISCOVERY_METHODS)}")
+        self.name = name
+        self.base_url = base_url.rstrip('/')
+        self.title = title or name
+        self.index_urls = index_urls or [f"{self.base_url}/blog/all"]
+        self.sitemap_url = sitemap_url or f"{self.base_url}/sitemap.xml"
+        self.feed_url = feed_url or f"{self.base_url}/blog/rss.xml"
+        self.link_pattern = link_pattern
+        self.link_re = re.compile(link_pattern)
+        self.content_selectors = list(content_selectors or ARTICLE_SELECTORS)
+        self.date_class_re = re.compile(date_class)
+        self.author_class_re = re.compile(author_class)
+        self.category_keywords = category_keywords or CATEGORY_KEYWORDS
+        self.category_prompts = CATEGORY_PROMPTS if category_prompts is None else category_prompts
+        self.discovery = discovery
+        self.workers = workers
+        self.requests_per_second = requests_per_second
+        # The single-pass extractor matches selectors while walking the tree:
+        # tag names by dict lookup, class fragments by substring
+        self.selector_tags = {}
+        self.selector_fragments = []
+        for i, selector in enumerate(self.content_selectors):
+            if SELECTOR_TAG_RE.match(selector):
+                self.selector_tags.setdefault(selector, i)
+            elif match := SELECTOR_CLASS_RE.match(selector):
+                self.selector_fragments.append((i, match.group(1)))
+            else:
+                raise ValueError(f"Unsupported content selector {selector!r} for site {name!r}; "
+                                 f"use a tag name or [class*=\"fragment\"]")
+
+    @property
+    def hosts(self):
+        """Hosts this site's pages are fetched from"""
+        urls = [self.base_url, self.sitemap_url, self.feed_url] + self.index_urls
+        return sorted({urlparse(url).netloc for url in urls})
+
+    def is_post_path(self, path):
+        """Whether a sitemap or feed entry with this URL path is a blog post"""
+        return bool(self.link_re.match(path.rstrip('/') or path))
+
+
+# The blog this script was written for; used when no profile is given
+STATSIG_PROFILE = SiteProfile('statsig', 'https://statsig.com', title='Statsig Blog')
+
+
+def load_site_profiles(path):
+    """Read site profiles from a JSON file holding a list of SiteProfile arguments"""
+    with open(path, encoding='utf-8') as f:
+        entries = json.load(f)
+    profiles = []
+    for entry in entries:
+        try:
+            profiles.append(SiteProfile(**entry))
+        except TypeError as e:
+            raise ValueError(f"Bad site profile {entry.get('name', entry)!r} in {path}: {e}") from None
+    names = [profile.name for profile in profiles]
+    if len(set(names)) != len(names):
+        raise ValueError(f"Site profile names in {path} must be unique")
+    return profiles
+
+
+def _xml_name(element):
+    """Tag name of an XML element without its namespace"""
+    return element.tag.rsplit('}', 1)[-1]
+
+
+def _xml_child_text(element, name):
+    for child in element:
+        if _xml_name(child) == name:
+            return (child.text or '').strip() or None
+    return None
+
+
+def _feed_entry_link(entry):
+    """Post URL of an RSS <item> or Atom <entry>"""
+    for child in entry:
+        if _xml_name(child) == 'link':
+            if child.get('href') and child.get('rel', 'alternate') == 'alternate':
+                return child.get('href').strip()
+            if child.text and child.text.strip():
+                return child.text.strip()
+    return None
+
+
+def _parse_lastmod(value):
+    """Parse a sitemap W3C datetime or an RSS RFC 822 date as naive local time"""
+    if not value:
+        return None
+    try:
+        parsed = datetime.fromisoformat(value.replace('Z', '+00:00'))
+    except ValueError:
+        try:
+            parsed = email.utils.parsedate_to_datetime(value)
+        except (TypeError, ValueError):
+            return None
+    if parsed.tzinfo is not None:
+        parsed = parsed.astimezone().replace(tzinfo=None)
+    return parsed
+
+
+def _class_matches(classes, pattern):
+    """Match a class attribute against a regex the way BeautifulSoup's find(class_=...) does"""
+    if isinstance(classes, str):
+        return pattern.search(classes) is not None
+    return (any(pattern.search(c) for c in classes)
+            or pattern.search(' '.join(classes)) is not None)
+
+
+class JsonLdScanner:
+    """Incremental scanner for JSON-LD blocks in HTML fed to it in chunks, without
+    building a document tree.
+
+    Only the unscanned tail of the input is buffered, so a page can be read until
+    the wanted block has arrived and the connection closed.
+    """
+
+    def __init__(self):
+        self._buffer = b''
+
+    def feed(self, chunk):
+        """Scan the next chunk; returns the raw JSON of every block it completes"""
+        buffer = self._buffer + chunk
+        blocks = []
+        while True:
+            start = JSON_LD_OPEN_RE.search(buffer)
+            if not start:
+                # Keep a partial tag that the next chunk may complete
+                cut = buffer.rfind(b'<')
+                self._buffer = buffer[cut:] if cut != -1 and len(buffer) - cut < 256 else b''
+                return blocks
+            end = SCRIPT_CLOSE_RE.search(buffer, start.end())
+            if not end:
+                self._buffer = buffer[start.start():]
+                return blocks
+            blocks.append(buffer[start.end():end.start()].decode('utf-8', errors='replace'))
+            buffer = buffer[end.end():]
+
+
+def blog_posting_metadata(raw):
+    """Title, dates and author from a JSON-LD block, or None if it is not a BlogPosting"""
+    try:
+        data = json.loads(raw)
+    except ValueError:
+        return None
+    if not isinstance(data, dict) or data.get('@type') != 'BlogPosting':
+        return None
+    author = data.get('author')
+    return {
+        'title': data.get('headline', ''),
+        'date': data.get('datePublished', ''),
+        'date_modified': data.get('dateModified', ''),
+        'author': author.get('name', '') if isinstance(author, dict) else '',
+    }
+
+
+def scan_metadata(html):
+    """BlogPosting metadata of a complete page, as the streaming probe reads it"""
+    for raw in JsonLdScanner().feed(html):
+        metadata = blog_posting_metadata(raw)
+        if metadata:
+            return metadata
+    return None
+
+
+class TextAnalysis:
+    """Sentence and line splits of a post body, computed once and shared by the extractors"""
+
+    def __init__(self, text):
+        self.text = text
+        self.raw_sentences = SENTENCE_SPLIT_RE.split(text)
+        self.raw_lines = text.split('\n')
+        self.lines = [ln.strip() for ln in self.raw_lines if ln.strip()]
+
+
+class KeywordMatcher:
+    """Finds every keyword of a category table in a single regex pass.
+
+    The keywords are compiled into one trie-shaped alternation. A keyword must start
+    and end at a word boundary, so 'ai' no longer matches inside 'maintain' nor
+    'product' inside 'productivity'. Keywords longer than three letters also match
+    their regular inflections ('experiments', 'released', 'releasing',
+    'controlled'); shorter ones are acronyms and may only be plural ('llms').
+    """
+    ACRONYM_LENGTH = 3
+    INFLECTIONS = ('s', 'es', 'ed', 'ing')
+    E_INFLECTIONS = ('s', 'd')  # keywords ending in 'e': 'guides', 'released'; 'releasing' drops the 'e'
+    DOUBLING_CONSONANTS = frozenset('bdgklmnprt')  # 'control' -> 'controlling'
+
+    def __init__(self, category_keywords):
+        self.categories = list(category_keywords)
+        keyword_categories = defaultdict(list)
+        for category, keywords in category_keywords.items():
+            for keyword in keywords:
+                keyword_categories[keyword.lower()].append(category)
+
+        # Every spelling a keyword may start with in the text, mapped to the keyword
+        # and the endings that must follow it
+        self._forms = {keyword: (keyword, self._endings(keyword)) for keyword in keyword_categories}
+        for keyword in keyword_categories:
+            if len(keyword) <= self.ACRONYM_LENGTH or not keyword[-1].isalpha():
+                continue
+            if keyword.endswith('e'):
+                self._forms.setdefault(keyword[:-1], (keyword, ('ing',)))
+            elif keyword[-1] in self.DOUBLING_CONSONANTS:
+                self._forms.setdefault(keyword + keyword[-1], (keyword, ('ed', 'ing')))
+        self.pattern = re.compile(r'\b(' + self._trie_pattern() + r')')
+
+        # A keyword containing another one ('data pipeline' contains 'data') also
+        # counts as a hit for the shorter keyword's categories, but each category
+        # counts once per match ('ai-generated' is one AI hit, not two)
+        self._hit_categories = {}
+        for keyword in keyword_categories:
+            hits = []
+            for other, categories in keyword_categories.items():
+                if other == keyword or re.search(r'\b' + re.escape(other) + self._suffix(self._forms[other][1]),
+                                                 keyword):
+                    hits.extend(categories)
+            self._hit_categories[keyword] = list(dict.fromkeys(hits))
+
+    def _endings(self, keyword):
+        """Optional endings of a keyword spelled as-is"""
+        if len(keyword) <= self.ACRONYM_LENGTH:
+            return ('s',)
+        return self.E_INFLECTIONS if keyword.endswith('e') else self.INFLECTIONS
+
+    def _suffix(self, endings, optional=True):
+        # A lookahead, so the match (and the form lookup) is the bare spelling
+        return r'(?=(?:' + '|'.join(endings) + r')' + ('?' if optional else '') + r'\b)'
+
+    def _trie_pattern(self):
+        trie = {}
+        for form in self._forms:
+            node = trie
+            for ch in form:
+                node = node.setdefault(ch, {})
+            node[''] = form
+
+        def build(node):
+            # Children come before the end-of-keyword branch so the longest keyword wins
+            branches = [re.escape(ch) + build(child) for ch, child in sorted(node.items()) if ch]
+            if '' in node:
+                keyword, endings = self._forms[node['']]
+                branches.append(self._suffix(endings, optional=node[''] == keyword))
+            return branches[0] if len(branches) == 1 else '(?:' + '|'.join(branches) + ')'
+
+        return build(trie)
+
+    def count(self, text):
+        """Return {category: hits} for lower-cased `text`, in table order, omitting zero counts"""
+        hits = Counter()
+        for match in self.pattern.finditer(text):
+            hits.update(self._hit_categories[self._forms[match.group(1)][0]])
+        return {category: hits[category] for category in self.categories if hits[category]}
+
+
+class NearDuplicateDetector:
+    """Online MinHash-LSH over word shingles of post text.
+
+    A post is only compared with earlier posts that share an LSH band with it, so
+    clustering a crawl takes roughly linear time. The first post of a cluster is its
+    canonical copy; later near-duplicates point to it.
+    """
+
+    def __init__(self, threshold=0.8, num_perm=64, bands=16, shingle_size=5):
+        if num_perm % bands:
+            raise ValueError("num_perm must be a multiple of bands")
+        self.threshold = threshold
+        self.bands = bands
+        self.rows = num_perm // bands
+        self.shingle_size = shingle_size
+        # XOR with a random mask stands in for a hash permutation; seeded so runs agree
+        rng = random.Random(0x5EED)
+        self._masks = [rng.getrandbits(64) for _ in range(num_perm)]
+        self._buckets = defaultdict(list)
+        self._signatures = {}
+        self.titles = {}
+        self.canonical = {}                  # duplicate url -> (canonical url, similarity)
+        self.duplicates = defaultdict(list)  # canonical url -> [(url, title, similarity)]
+
+    def signature(self, text):
+        """MinHash signature of the word shingles of `text`"""
+        words = re.findall(r'\w+', text.lower())
+        size = self.shingle_size
+        shingles = {' '.join(words[i:i + size]) for i in range(max(1, len(words) - size + 1))}
+        hashes = [int.from_bytes(hashlib.blake2b(shingle.encode('utf-8'), digest_size=8).digest(), 'little')
+                  for shingle in shingles]
+        return tuple(min(map(mask.__xor__, hashes)) for mask in self._masks)
+
+    def add(self, url, title, text):
+        """Index a post. Returns (canonical url, estimated similarity) when it is a
+        near-duplicate of an earlier post, otherwise None."""
+        if not text or not text.strip():
+            return None
+        signature = self.signature(text)
+        keys = [(band, signature[band * self.rows:(band + 1) * self.rows]) for band in range(self.bands)]
+        candidates = set()
+        for key in keys:
+            candidates.update(self._buckets.get(key, ()))
+        best = None
+        for other in candidates:
+            similarity = sum(a == b for a, b in zip(signature, self._signatures[other])) / len(signature)
+            if similarity >= self.threshold and (best is None or similarity > best[1]):
+                best = (other, similarity)
+        for key in keys:
+            self._buckets[key].append(url)
+        self._signatures[url] = signature
+        self.titles[url] = title
+        if best is None:
+            return None
+        canonical = self.canonical.get(best[0], best)[0]
+        self.canonical[url] = (canonical, best[1])
+        self.duplicates[canonical].append((url, title, best[1]))
+        return canonical, best[1]
+
+
+def l2_normalize(matrix):
+    """Scale the rows of a sparse matrix to unit length; all-zero rows stay zero"""
+    norms = np.sqrt(np.asarray(matrix.multiply(matrix).sum(axis=1)).ravel())
+    norms[norms == 0] = 1.0
+    return sp.csr_matrix(sp.diags(1.0 / norms) @ matrix)
+
+
+class CorpusSummarizer:
+    """Extractive summaries scored against the whole corpus at once.
+
+    Every candidate sentence of every post becomes a row of one sparse TF-IDF
+    matrix, with IDF fitted over all posts. `tfidf` scores a sentence by its cosine
+    similarity to its post's centroid; `textrank` runs PageRank over each post's
+    sentence-similarity graph, for all posts together on one block-diagonal matrix.
+    Sentences repeated across many posts (navigation, footers, calls to action)
+    are dropped before scoring.
+    """
+
+    def __init__(self, method='tfidf', summary_sentences=2, key_points=8, boilerplate_share=0.2,
+                 damping=0.85, iterations=30):
+        if method not in SUMMARIZERS[1:]:
+            raise ValueError(f"Unknown corpus summarizer {method!r}; choose from {', '.join(SUMMARIZERS[1:])}")
+        if np is None:
+            raise ImportError("Corpus summarizers require numpy and scipy (pip install numpy scipy)")
+        self.method = method
+        self.summary_sentences = summary_sentences
+        self.key_points = key_points
+        self.boilerplate_share = boilerplate_share
+        self.damping = damping
+        self.iterations = iterations
+
+    def candidates(self, text):
+        """Sentences of a post worth ranking: headers are skipped, bullets count as sentences"""
+        sentences = []
+        for line in normalize_text(text).split('\n'):
+            line = line.strip()
+            if not line or line.startswith('#'):
+                continue
+            bullet = BULLET_RE.match(line)
+            if bullet:
+                line = line[bullet.end():]
+            sentences.extend(s.strip() for s in SENTENCE_SPLIT_RE.split(line) if len(s.strip()) >= 25)
+        return list(dict.fromkeys(sentences))
+
+    def summarize(self, texts):
+        """Return a (summary, key_points) pair per text, in order; None for a text
+        without any candidate sentences"""
+        post_sentences = [self.candidates(text) for text in texts]
+        if len(texts) >= 10:
+            occurrences = Counter(sentence for sentences in post_sentences for sentence in sentences)
+            limit = self.boilerplate_share * len(texts)
+            post_sentences = [[s for s in sentences if occurrences[s] < limit] for sentences in post_sentences]
+        
+        # Sentence x term counts for the whole corpus, rows grouped by post
+        vocabulary = {}
+        indices, indptr, post_of = [], [0], []
+        for post, sentences in enumerate(post_sentences):
+            for sentence in sentences:
+                indices.extend(vocabulary.setdefault(word, len(vocabulary))
+                               for word in WORD_RE.findall(sentence.lower()) if word not in STOPWORDS)
+                indptr.append(len(indices))
+                post_of.append(post)
+        if not post_of:
+            return [None] * len(texts)
+        counts = sp.csr_matrix((np.ones(len(indices)), indices, indptr), shape=(len(post_of), len(vocabulary)))
+        counts.sum_duplicates()
+        post_of = np.array(post_of)
+        offsets = np.searchsorted(post_of, np.arange(len(texts) + 1))
+        membership = sp.csr_matrix((np.ones(len(post_of)), (post_of, np.arange(len(post_of)))),
+                                   shape=(len(texts), len(post_of)))
+        
+        # Smoothed IDF over posts and sublinear term frequency
+        document_frequency = np.asarray(((membership @ counts) > 0).sum(axis=0)).ravel()
+        idf = np.log((1 + len(texts)) / (1 + document_frequency)) + 1
+        counts.data = 1 + np.log(counts.data)
+        vectors = l2_normalize(counts @ sp.diags(idf))
+        
+        if self.method == 'tfidf':
+            centroids = l2_normalize(membership @ vectors)
+            scores = np.asarray(vectors.multiply(centroids[post_of]).sum(axis=1)).ravel()
+        else:
+            scores = self.textrank(vectors, offsets, post_of)
+        
+        results = []
+        for post, sentences in enumerate(post_sentences):
+            if not sentences:
+                results.append(None)
+                continue
+            ranked = np.argsort(-scores[offsets[post]:offsets[post + 1]], kind='stable')
+            chosen = [i for i in ranked if len(sentences[i]) > 40][:self.summary_sentences]
+            points = [i for i in ranked if i not in chosen and len(sentences[i]) <= 180][:self.key_points]
+            # Both read in document order
+            results.append((' '.join(sentences[i] for i in sorted(chosen))[:800],
+                            [sentences[i] for i in sorted(points)]))
+        return results
+
+    def textrank(self, vectors, offsets, post_of):
+        """PageRank of every sentence within its own post's cosine-similarity graph"""
+        blocks = [vectors[start:end] @ vectors[start:end].T
+                  for start, end in zip(offsets[:-1], offsets[1:]) if end > start]
+        similarity = sp.csr_matrix(sp.block_diag(blocks))
+        similarity.setdiag(0)
+        similarity.eliminate_zeros()
+        out_weight = np.asarray(similarity.sum(axis=1)).ravel()
+        out_weight[out_weight == 0] = 1.0
+        transition = sp.csr_matrix(sp.diags(1.0 / out_weight) @ similarity).T.tocsr()
+        # Sentences of a post share its teleport mass
+        post_size = np.diff(offsets)[post_of].astype(float)
+        rank = 1.0 / post_size
+        for _ in range(self.iterations):
+            rank = (1 - self.damping) / post_size + self.damping * (transition @ rank)
+        return rank
+
+
+class RelatedPosts:
+    """Top-k most similar posts by cosine similarity of sparse TF-IDF vectors of
+    their title and text.
+
+    Similarities come from blocked sparse matrix products (a block of rows against
+    the whole corpus at a time), never from pairwise loops. With a `path`, term
+    counts and neighbour lists persist in SQLite: a later run scores only new or
+    changed posts against the corpus and splices them into the existing lists,
+    recomputing just the lists that contained a changed post. Untouched pairs keep
+    the scores (and IDF weights) of the run that computed them.
+    """
+    BLOCK_ROWS = 256
+
+    def __init__(self, path=None, k=5, min_score=0.05):
+        if np is None:
+            raise ImportError("Related posts require numpy and scipy (pip install numpy scipy)")
+        self.path = path
+        self.k = k
+        self.min_score = min_score
+        self.terms = {}        # url -> {term: count}
+        self.titles = {}
+        self.hashes = {}
+        self.neighbours = {}   # url -> [(url, score)], best first
+        self.pending = set()   # posts added or changed since their neighbours were computed
+        self.stats = Counter()
+        self._dirty = set()
+        self._conn = None
+        if path:
+            self._conn = sqlite3.connect(path)
+            self._conn.executescript("""
+                CREATE TABLE IF NOT EXISTS related_posts (
+                    url TEXT PRIMARY KEY,
+                    title TEXT,
+                    content_hash TEXT,
+                    terms TEXT,
+                    neighbours TEXT
+                );
+            """)
+            for url, title, content_hash, terms, neighbours in self._conn.execute(
+                    'SELECT url, title, content_hash, terms, neighbours FROM related_posts'):
+                self.titles[url] = title
+                self.hashes[url] = content_hash
+                self.terms[url] = json.loads(terms)
+                if neighbours is None:
+                    self.pending.add(url)
+                else:
+                    self.neighbours[url] = [tuple(entry) for entry in json.loads(neighbours)]
+
+    def add(self, url, title, text):
+        """Record a post; it is (re)scored by the next `update` unless its text is unchanged"""
+        content_hash = hashlib.sha256(f"{title}\0{text}".encode('utf-8', 'surrogatepass')).hexdigest()
+        if self.hashes.get(url) == content_hash:
+            self.stats['unchanged'] += 1
+            return
+        self.stats['changed' if url in self.hashes else 'added'] += 1
+        self.titles[url] = title
+        self.hashes[url] = content_hash
+        self.terms[url] = dict(Counter(word for word in WORD_RE.findall(f"{title} {text}".lower())
+                                       if word not in STOPWORDS))
+        self.pending.add(url)
+        self._dirty.add(url)
+
+    def update(self):
+        """Bring the neighbour lists up to date; returns how many posts were scored
+        against the whole corpus"""
+        if not self.pending:
+            return 0
+        urls = list(self.terms)
+        position = {url: i for i, url in enumerate(urls)}
+        vectors = self._vectors(urls)
+        
+        # Lists holding a changed post may now miss a post that was beyond their top k
+        changed = {url for url in self.pending if url in self.neighbours}
+        stale = {url for url, related in self.neighbours.items()
+                 if url not in self.pending and any(other in changed for other, _ in related)}
+        rescored = sorted(position[url] for url in self.pending | stale)
+        for start in range(0, len(rescored), self.BLOCK_ROWS):
+            rows = rescored[start:start + self.BLOCK_ROWS]
+            similarity = self._similarity(vectors, rows)
+            similarity[np.arange(len(rows)), rows] = 0.0
+            for row, i in zip(similarity, rows):
+                self.neighbours[urls[i]] = self._top(row, urls)
+                self._dirty.add(urls[i])
+        
+        # Every other list only has to consider the new and changed posts as candidates
+        kept = np.setdiff1d(np.arange(len(urls)), rescored)
+        new = np.array(sorted(position[url] for url in self.pending))
+        if kept.size:
+            floor = np.array([self.neighbours[urls[j]][-1][1] if len(self.neighbours[urls[j]]) >= self.k
+                              else self.min_score for j in kept])
+            for start in range(0, len(new), self.BLOCK_ROWS):
+                block = new[start:start + self.BLOCK_ROWS]
+                similarity = self._similarity(vectors[kept], block, vectors)
+                for b, j in zip(*np.nonzero(similarity >= floor)):
+                    url = urls[kept[j]]
+                    merged = self.neighbours[url] + [(urls[block[b]], round(float(similarity[b, j]), 4))]
+                    merged.sort(key=lambda entry: -entry[1])
+                    self.neighbours[url] = merged[:self.k]
+                    self._dirty.add(url)
+        
+        scored = len(rescored)
+        self.stats['scored'] += scored
+        self.pending.clear()
+        return scored
+
+    @staticmethod
+    def _similarity(corpus, rows, vectors=None):
+        """Dense cosine similarities of `rows` (of `vectors`, default `corpus`) against
+        every row of `corpus`. The product stays sparse x sparse; only the
+        len(rows) x len(corpus) result, which is nearly full, is made dense."""
+        block = (corpus if vectors is None else vectors)[rows]
+        return (block @ corpus.T).toarray()
+
+    def _vectors(self, urls):
+        """L2-normalized TF-IDF rows of `urls`, with IDF over every stored post"""
+        vocabulary = {}
+        indices, data, indptr = [], [], [0]
+        for url in urls:
+            for term, count in self.terms[url].items():
+                indices.append(vocabulary.setdefault(term, len(vocabulary)))
+                data.append(count)
+            indptr.append(len(indices))
+        counts = sp.csr_matrix((np.array(data, dtype=float), indices, indptr), shape=(len(urls), len(vocabulary)))
+        document_frequency = np.bincount(counts.indices, minlength=len(vocabulary))
+        idf = np.log((1 + len(urls)) / (1 + document_frequency)) + 1
+        counts.data = 1 + np.log(counts.data)
+        return l2_normalize(counts @ sp.diags(idf))
+
+    def _top(self, row, urls):
+        k = min(self.k, len(row) - 1)
+        if k <= 0:
+            return []
+        top = np.argpartition(-row, k - 1)[:k]
+        top = top[np.argsort(-row[top], kind='stable')]
+        return [(urls[i], round(float(row[i]), 4)) for i in top if row[i] >= self.min_score]
+
+    def related(self, url):
+        """(url, title, score) of the posts most similar to `url`, best first"""
+        return [(other, self.titles[other], score) for other, score in self.neighbours.get(url, ())]
+
+    def write_adjacency(self, path):
+        """Write the neighbour lists of every known post as JSON"""
+        adjacency = {url: [{'url': other, 'title': title, 'score': score}
+                           for other, title, score in self.related(url)]
+                     for url in self.terms}
+        with AtomicFile(path) as f:
+            json.dump({'k': self.k, 'min_score': self.min_score, 'posts': adjacency}, f, indent=2, ensure_ascii=False)
+
+    def close(self):
+        if self._conn:
+            self._conn.executemany(
+                'INSERT OR REPLACE INTO related_posts (url, title, content_hash, terms, neighbours) '
+                'VALUES (?, ?, ?, ?, ?)',
+                [(url, self.titles[url], self.hashes[url], json.dumps(self.terms[url], ensure_ascii=False),
+                  json.dumps(self.neighbours[url]) if url in self.neighbours else None)
+                 for url in self._dirty])
+            self._conn.commit()
+            self._conn.close()
+            self._conn = None
+
+
+class PostRecord:
+    """Enriched post as kept for rendering: slotted, with interned category names and
+    without the raw text, which is only needed until the post has been analysed"""
+    __slots__ = ('url', 'slug', 'title', 'date', 'author', 'has_images', 'has_code', 'categories',
+                 'category_scores', 'summary', 'key_points', 'data_points', 'examples', 'takeaways',
+                 'duplicate_of')
+
+    def __init__(self, url, title='', slug=None, date='', author='', has_images=False, has_code=False,
+                 categories=(), category_scores=None, summary='', key_points=(), data_points=(),
+                 examples=(), takeaways=(), duplicate_of=None):
+        self.url = url
+        self.slug = slug
+        self.title = title
+        self.date = date
+        self.author = author
+        self.has_images = has_images
+        self.has_code = has_code
+        # Category names repeat across every post; interning keeps one copy of each
+        self.categories = tuple(sys.intern(category) for category in categories)
+        self.category_scores = {sys.intern(category): hits for category, hits in (category_scores or {}).items()}
+        self.summary = summary
+        self.key_points = tuple(key_points)
+        self.data_points = tuple(data_points)
+        self.examples = tuple(examples)
+        self.takeaways = tuple(takeaways)
+        self.duplicate_of = duplicate_of
+
+    @classmethod
+    def from_post(cls, post):
+        """Build a record from an enriched post dict, leaving its text behind"""
+        return cls(**{field: post[field] for field in cls.__slots__ if field in post})
+
+    def to_dict(self):
+        return {field: getattr(self, field) for field in self.__slots__}
+
+
+class PostSpool:
+    """Temporary JSONL file of post records; only record offsets stay in memory.
+
+    Render threads read records concurrently, so each seek and read of the shared
+    file handle happens under a lock.
+    """
+
+    def __init__(self):
+        self._file = tempfile.TemporaryFile(mode='w+b')
+        self._offsets = array('q')
+        self._lock = threading.Lock()
+
+    def __len__(self):
+        return len(self._offsets)
+
+    def append(self, record):
+        """Write a PostRecord to the spool and return its index"""
+        line = json.dumps(record.to_dict(), ensure_ascii=False).encode('utf-8') + b'\n'
+        with self._lock:
+            self._file.seek(0, os.SEEK_END)
+            self._offsets.append(self._file.tell())
+            self._file.write(line)
+            return len(self._offsets) - 1
+
+    def get(self, index):
+        with self._lock:
+            self._file.seek(self._offsets[index])
+            line = self._file.readline()
+        return PostRecord(**json.loads(line))
+
+    def posts(self, indexes):
+        """Return a lazily loaded sequence of the given records"""
+        return SpooledPosts(self, indexes)
+
+    def __iter__(self):
+        for index in range(len(self._offsets)):
+            yield self.get(index)
+
+    def close(self):
+        self._file.close()
+
+
+class SpooledPosts:
+    """Read-only list of spooled post records that are loaded one at a time on iteration"""
+
+    def __init__(self, spool, indexes):
+        self.spool = spool
+        self.indexes = array('q', indexes)
+
+    def __len__(self):
+        return len(self.indexes)
+
+    def __iter__(self):
+        for index in self.indexes:
+            yield self.spool.get(index)
+
+
+class AtomicFile:
+    """Text file written under a temporary name next to `path` and renamed over
+    `path` on close, so a crash mid-write never leaves a truncated output behind
+    and readers see either the old file or the complete new one"""
+
+    def __init__(self, path):
+        self.path = path
+        self.tmp_path = f"{path}.tmp"
+        self._file = open(self.tmp_path, 'w', encoding='utf-8')
+
+    def write(self, text):
+        return self._file.write(text)
+
+    def close(self):
+        """Flush the file to disk and move it into place"""
+        if self._file:
+            self._file.flush()
+            os.fsync(self._file.fileno())
+            self._file.close()
+            self._file = None
+            os.replace(self.tmp_path, self.path)
+
+    def discard(self):
+        """Drop the temporary file, leaving `path` as it was"""
+        if self._file:
+            self._file.close()
+            self._file = None
+            os.remove(self.tmp_path)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        if exc_type is None:
+            self.close()
+        else:
+            self.discard()
+
+
+# Fields of an exported post record, in column order
+RECORD_FIELDS = ['url', 'slug', 'title', 'date', 'author', 'categories', 'category_scores', 'summary',
+                 'key_points', 'data_points', 'examples', 'takeaways', 'has_images', 'has_code',
+                 'duplicate_of', 'text']
+
+
+def export_record(post):
+    """Flatten an enriched post into an export record with a fixed field order"""
+    return {field: post.get(field) for field in RECORD_FIELDS}
+
+
+class JsonlWriter:
+    """Writes one JSON object per post"""
+    extension = '.jsonl'
+
+    def __init__(self, path):
+        self.path = path
+        self._file = AtomicFile(path)
+
+    def write(self, record):
+        self._file.write(json.dumps(record, ensure_ascii=False) + '\n')
+
+    def close(self):
+        self._file.close()
+
+    def discard(self):
+        self._file.discard()
+
+
+class ArrowTableWriter:
+    """Base for columnar writers: buffers records and flushes them as record batches"""
+    batch_size = 500
+
+    def __init__(self, path):
+        if pa is None:
+            raise ImportError("pyarrow is required for Parquet/Arrow output (pip install pyarrow)")
+        self.path = path
+        self.tmp_path = f"{path}.tmp"
+        self.schema = pa.schema([
+            ('url', pa.string()), ('slug', pa.string()), ('title', pa.string()),
+            ('date', pa.string()), ('author', pa.string()),
+            ('categories', pa.list_(pa.string())),
+            ('category_scores', pa.map_(pa.string(), pa.int64())),
+            ('summary', pa.string()),
+            ('key_points', pa.list_(pa.string())), ('data_points', pa.list_(pa.string())),
+            ('examples', pa.list_(pa.string())), ('takeaways', pa.list_(pa.string())),
+            ('has_images', pa.bool_()), ('has_code', pa.bool_()),
+            ('duplicate_of', pa.string()), ('text', pa.string()),
+        ])
+        self._rows = []
+        self._writer = self._open_writer()
+        self._closed = False
+
+    def _open_writer(self):
+        raise NotImplementedError
+
+    def write(self, record):
+        record = dict(record)
+        if record['category_scores'] is not None:
+            record['category_scores'] = list(record['category_scores'].items())
+        self._rows.append(record)
+        if len(self._rows) >= self.batch_size:
+            self._flush()
+
+    def _flush(self):
+        if self._rows:
+            self._writer.write_batch(pa.RecordBatch.from_pylist(self._rows, schema=self.schema))
+            self._rows = []
+
+    def close(self):
+        self._flush()
+        self._writer.close()
+        self._closed = True
+        os.replace(self.tmp_path, self.path)
+
+    def discard(self):
+        """Drop the temporary file, leaving `path` as it was"""
+        if not self._closed:
+            self._closed = True
+            self._writer.close()
+            os.remove(self.tmp_path)
+
+
+class ParquetWriter(ArrowTableWriter):
+    extension = '.parquet'
+
+    def _open_writer(self):
+        return pq.ParquetWriter(self.tmp_path, self.schema)
+
+
+class ArrowWriter(ArrowTableWriter):
+    extension = '.arrow'
+
+    def _open_writer(self):
+        return pa.ipc.new_file(self.tmp_path, self.schema)
+
+
+# Structured outputs written alongside the markdown; see --format
+RECORD_WRITERS = {
+    'jsonl': JsonlWriter,
+    'parquet': ParquetWriter,
+    'arrow': ArrowWriter,
+}
+OUTPUT_FORMATS = ('markdown', 'shards') + tuple(RECORD_WRITERS)
+
+
+# Sharded markdown output: shard budgets are counted in estimated tokens or in bytes
+SHARD_UNITS = ('tokens', 'bytes')
+XREF_RE = re.compile(r'\]\(#xref-([a-z0-9-]+)\)')
+
+
+def shard_size(text, unit):
+    """Size of `text` in budget units; tokens are estimated at four characters each"""
+    if unit == 'bytes':
+        return len(text.encode('utf-8'))
+    return (len(text) + 3) // 4
+
+
+class ShardWriter:
+    """Appends markdown blocks to numbered shard files, starting a new file whenever
+    the next block would push the current one over the budget"""
+
+    def __init__(self, output_dir, budget, unit='tokens', title=STATSIG_PROFILE.title):
+        self.output_dir = output_dir
+        self.budget = budget
+        self.unit = unit
+        self.title = title
+        self.shards = []
+        self.current = None
+        self._file = None
+        self._header_size = 0
+
+    def add(self, block, category=None, continuation=None, size_text=None):
+        """Append `block` and return the manifest entry of the shard it landed in.
+
+        `continuation` is repeated at the top of a new shard when the block does not
+        fit, and `size_text` is measured instead of `block` when a placeholder in
+        the block is replaced later.
+        """
+        size = shard_size(size_text or block, self.unit) + 1
+        if self._file is None or (self.current['size'] + size > self.budget
+                                  and self.current['size'] > self._header_size):
+            self._open(continuation)
+        self._file.write(block + '\n')
+        self.current['size'] += size
+        if category and category not in self.current['categories']:
+            self.current['categories'].append(category)
+        return self.current
+
+    def _open(self, continuation):
+        self.close()
+        name = f"part-{len(self.shards) + 1:04d}.md"
+        header = f"# {self.title} Knowledge Base — {name}\n\n[Index](index.md) · [Manifest](manifest.json)\n"
+        if continuation:
+            header += continuation
+        self._file = AtomicFile(os.path.join(self.output_dir, name))
+        self._file.write(header + '\n')
+        self._header_size = shard_size(header, self.unit) + 1
+        self.current = {'file': name, 'size': self._header_size, 'categories': [], 'posts': []}
+        self.shards.append(self.current)
+
+    def close(self):
+        if self._file:
+            self._file.close()
+            self._file = None
+
+    def discard(self):
+        """Drop the shard being written; shards already closed stay in place"""
+        if self._file:
+            self._file.discard()
+            self._file = None
+
+
+class RateLimiter:
+    """Per-host token bucket shared by all fetch workers; `rates` overrides the
+    requests per second of individual hosts"""
+
+    def __init__(self, requests_per_second=2.0, burst=1):
+        self.rate = requests_per_second
+        self.rates = {}
+        self.burst = max(1, burst)
+        self._buckets = {}  # host -> (tokens, last refill timestamp)
+        self._lock = threading.Lock()
+
+    def acquire(self, url):
+        """Block until a request to the host of `url` is allowed"""
+        while wait := self._take(url):
+            time.sleep(wait)
+
+    async def acquire_async(self, url):
+        """Like `acquire`, but waits without blocking the event loop"""
+        while wait := self._take(url):
+            await asyncio.sleep(wait)
+
+    def _take(self, url):
+        """Take a token for the host of `url`; returns 0 on success or the seconds until one is due"""
+        host = urlparse(url).netloc
+        rate = self.rates.get(host, self.rate)
+        if not rate or rate <= 0:
+            return 0
+        with self._lock:
+            now = time.monotonic()
+            tokens, last = self._buckets.get(host, (self.burst, now))
+            tokens = min(self.burst, tokens + (now - last) * rate)
+            if tokens >= 1:
+                self._buckets[host] = (tokens - 1, now)
+                return 0
+            self._buckets[host] = (tokens, now)
+            return (1 - tokens) / rate
+
+
+class HostScheduler:
+    """Concurrency budget shared by the crawls of several sites: at most `per_host`
+    requests in flight to each host (or its entry in `limits`) and at most `total`
+    overall.
+
+    When requests are waiting, a free slot goes to the host whose turn it is and
+    that host then moves to the back of the line, so requests interleave fairly
+    across hosts and one site's backlog cannot starve the others.
+    """
+
+    def __init__(self, per_host=4, total=None):
+        self.per_host = max(1, per_host)
+        self.total = total
+        self.limits = {}
+        self._in_flight = Counter()
+        self._running = 0
+        self._waiting = Counter()
+        self._turns = deque()  # hosts with waiting requests, in serving order
+        self._cond = threading.Condition()
+
+    @contextlib.contextmanager
+    def slot(self, url):
+        """Hold a request slot for the host of `url`, waiting for this host's turn"""
+        host = urlparse(url).netloc
+        with self._cond:
+            if not self._waiting[host]:
+                self._turns.append(host)
+            self._waiting[host] += 1
+            while self._next_host() != host:
+                self._cond.wait()
+            self._waiting[host] -= 1
+            self._turns.remove(host)
+            if self._waiting[host]:
+                self._turns.append(host)
+            self._in_flight[host] += 1
+            self._running += 1
+            # Another host may be next in line now
+            self._cond.notify_all()
+        try:
+            yield
+        finally:
+            with self._cond:
+                self._in_flight[host] -= 1
+                self._running -= 1
+                self._cond.notify_all()
+
+    def _next_host(self):
+        """The first host in line that is under its limit, or None while all slots are taken"""
+        if self.total and self._running >= self.total:
+            return None
+        return next((host for host in self._turns
+                     if self._in_flight[host] < self.limits.get(host, self.per_host)), None)
+
+
+class PostCache:
+    """SQLite store of fetched pages, parsed content and analysis keyed by post URL"""
+
+    def __init__(self, path):
+        self.path = path
+        self.stats = Counter()
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(path, check_same_thread=False)
+        self._conn.execute("""
+            CREATE TABLE IF NOT EXISTS posts (
+                url TEXT PRIMARY KEY,
+                etag TEXT,
+                last_modified TEXT,
+                content_hash TEXT,
+                html BLOB,
+                content TEXT,
+                analysis TEXT,
+                analysis_rules TEXT,
+                fetched_at TEXT,
+                metadata TEXT,
+                position INTEGER
+            )
+        """)
+        # Caches created before the metadata, analysis_rules and position columns existed;
+        # their analysis has no rules fingerprint and is recomputed on first use
+        columns = {row[1] for row in self._conn.execute('PRAGMA table_info(posts)')}
+        if 'metadata' not in columns:
+            self._conn.execute('ALTER TABLE posts ADD COLUMN metadata TEXT')
+        if 'analysis_rules' not in columns:
+            self._conn.execute('ALTER TABLE posts ADD COLUMN analysis_rules TEXT')
+        if 'position' not in columns:
+            self._conn.execute('ALTER TABLE posts ADD COLUMN position INTEGER')
+        self._conn.commit()
+
+    def get(self, url, analysis_rules):
+        """Return the cached record for `url`, or None if it has never been fetched"""
+        with self._lock:
+            row = self._conn.execute(
+                'SELECT etag, last_modified, content_hash, content, analysis, analysis_rules, metadata '
+                'FROM posts WHERE url = ?', (url,)).fetchone()
+        if not row or row[3] is None:
+            return None
+        etag, last_modified, content_hash, content, analysis, rules, metadata = row
+        return {
+            'etag': etag,
+            'last_modified': last_modified,
+            'content_hash': content_hash,
+            'content': json.loads(content),
+            'metadata': json.loads(metadata) if metadata else None,
+            # Analysis produced by other categorize/summarize rules is recomputed from the content
+            'analysis': json.loads(analysis) if analysis and rules == analysis_rules else None,
+        }
+
+    def get_html(self, url):
+        """Return the raw HTML stored for `url`"""
+        with self._lock:
+            row = self._conn.execute('SELECT html FROM posts WHERE url = ?', (url,)).fetchone()
+        return zlib.decompress(row[0]) if row and row[0] else None
+
+    def store_page(self, url, etag, last_modified, content_hash, html, content, metadata=None):
+        """Save a freshly downloaded page; any previous analysis is discarded"""
+        with self._lock:
+            self._conn.execute(
+                'INSERT OR REPLACE INTO posts (url, etag, last_modified, content_hash, html, content, '
+                'analysis, analysis_rules, fetched_at, metadata, position) VALUES (?, ?, ?, ?, ?, ?, NULL, NULL, ?, ?, '
+                '(SELECT position FROM posts WHERE url = ?))',
+                (url, etag, last_modified, content_hash, zlib.compress(html),
+                 json.dumps(content, ensure_ascii=False), datetime.now().isoformat(),
+                 json.dumps(metadata) if metadata else None, url))
+            self._conn.commit()
+
+    def store_positions(self, urls):
+        """Record the index order of `urls` (newest first), ahead of every post listed
+        by earlier runs. Incremental runs only list new posts, so positions keep
+        decreasing rather than being numbered from zero each run."""
+        with self._lock:
+            first = self._conn.execute('SELECT COALESCE(MIN(position), 0) FROM posts').fetchone()[0]
+            self._conn.executemany('UPDATE posts SET position = ? WHERE url = ?',
+                                   [(first - len(urls) + i, url) for i, url in enumerate(urls)])
+            self._conn.commit()
+
+    def update_validators(self, url, etag, last_modified, metadata=None):
+        """Refresh the ETag/Last-Modified (and JSON-LD metadata) of a page whose body did not change"""
+        with self._lock:
+            self._conn.execute(
+                'UPDATE posts SET etag = ?, last_modified = ?, fetched_at = ?, metadata = COALESCE(?, metadata) '
+                'WHERE url = ?',
+                (etag, last_modified, datetime.now().isoformat(), json.dumps(metadata) if metadata else None, url))
+            self._conn.commit()
+
+    def store_analysis(self, url, analysis, analysis_rules):
+        """Save the categories and summary computed for a cached page under the
+        fingerprint of the rules that produced them"""
+        with self._lock:
+            self._conn.execute(
+                'UPDATE posts SET analysis = ?, analysis_rules = ? WHERE url = ?',
+                (json.dumps(analysis, ensure_ascii=False), analysis_rules, url))
+            self._conn.commit()
+
+    def known_urls(self, prefix=None):
+        """Map every cached post URL (starting with `prefix`) to the (naive local) time it was last fetched"""
+        with self._lock:
+            rows = self._conn.execute(
+                'SELECT url, fetched_at FROM posts WHERE content IS NOT NULL AND substr(url, 1, ?) = ?',
+                (len(prefix or ''), prefix or '')).fetchall()
+        return {url: datetime.fromisoformat(fetched_at) for url, fetched_at in rows}
+
+    def iter_cached(self, analysis_rules, exclude=(), prefix=None):
+        """Yield (url, content, analysis) for cached posts not in `exclude` (and starting
+        with `prefix`), in the order they were last listed on the index. `analysis` is
+        None when it was computed by other rules than `analysis_rules`."""
+        with self._lock:
+            urls = [row[0] for row in self._conn.execute(
+                'SELECT url FROM posts WHERE content IS NOT NULL AND substr(url, 1, ?) = ? '
+                'ORDER BY position IS NULL, position, url', (len(prefix or ''), prefix or ''))]
+        for url in urls:
+            if url in exclude:
+                continue
+            cached = self.get(url, analysis_rules)
+            yield url, cached['content'], cached['analysis']
+
+    def record(self, event):
+        """Count a cache outcome (not_modified, unchanged, fetched)"""
+        with self._lock:
+            self.stats[event] += 1
+
+    def close(self):
+        self._conn.close()
+
+
+def normalize_text(text):
+    """Post text as summarize_post sees it: non-breaking spaces and trailing whitespace removed"""
+    return TRAILING_SPACE_RE.sub('\n', text.replace('\u00A0', ' '))
+
+
+def rules_fingerprint(*rules):
+    """Short stable hash of the patterns, keyword tables and thresholds behind an analysis stage"""
+    def encode(value):
+        if isinstance(value, re.Pattern):
+            return [value.pattern, value.flags]
+        raise TypeError(f"cannot fingerprint {type(value).__name__}")
+    return hashlib.sha256(json.dumps(rules, sort_keys=True, default=encode).encode()).hexdigest()[:16]
+
+
+class AnalysisMemo:
+    """SQLite memo of categorize/summarize results keyed by a hash of their normalized
+    input text and the fingerprint of the rules that produced them.
+
+    Each stage has its own rules fingerprint, so changing the keyword table only
+    misses on categorization and changing an extractor pattern only on summaries;
+    entries for old rules are never hit again and age out. Once the stored results
+    exceed `max_bytes`, the least recently used entries are evicted. New entries
+    and recency updates are written in batches of BATCH_SIZE, and by flush().
+    """
+    BATCH_SIZE = 64
+
+    def __init__(self, path, max_bytes=64 * 1024 * 1024):
+        self.path = path
+        self.max_bytes = max_bytes
+        self._lock = threading.Lock()
+        self._touched = []  # recency updates of hits, written in batches
+        self._pending = {}  # (stage, rules, digest) -> (value, used_at) of unwritten entries
+        # CPU worker processes open the same file, so wait for each other's writes
+        self._conn = sqlite3.connect(path, check_same_thread=False, timeout=30)
+        self._conn.execute('PRAGMA journal_mode=WAL')
+        self._conn.execute("""
+            CREATE TABLE IF NOT EXISTS analysis_memo (
+                stage TEXT,
+                rules TEXT,
+                digest TEXT,
+                value TEXT,
+                size INTEGER,
+                used_at REAL,
+                PRIMARY KEY (stage, rules, digest)
+            )
+        """)
+        self._conn.execute('CREATE INDEX IF NOT EXISTS analysis_memo_used_at ON analysis_memo (used_at)')
+        self._conn.commit()
+        self._size = self._stored_size()
+
+    @staticmethod
+    def digest(text):
+        return hashlib.sha256(text.encode('utf-8', 'surrogatepass')).hexdigest()
+
+    def get(self, stage, rules, digest):
+        """The memoized result, or None; a hit marks the entry as recently used"""
+        with self._lock:
+            pending = self._pending.get((stage, rules, digest))
+            if pending:
+                return json.loads(pending[0])
+            row = self._conn.execute(
+                'SELECT value FROM analysis_memo WHERE stage = ? AND rules = ? AND digest = ?',
+                (stage, rules, digest)).fetchone()
+            if row is None:
+                return None
+            self._touched.append((time.time(), stage, rules, digest))
+            if len(self._touched) >= self.BATCH_SIZE:
+                self._flush_touched()
+                self._conn.commit()
+        return json.loads(row[0])
+
+    def put(self, stage, rules, digest, value):
+        """Store a result; returns how many entries were evicted to make room when a
+        batch was written"""
+        data = json.dumps(value, ensure_ascii=False)
+        with self._lock:
+            self._pending[(stage, rules, digest)] = (data, time.time())
+            self._size += len(data)
+            if len(self._pending) >= self.BATCH_SIZE:
+                return self._write()
+        return 0
+
+    def _write(self):
+        """Write pending entries and recency updates in one transaction; returns how
+        many entries were evicted"""
+        self._conn.executemany(
+            'INSERT OR REPLACE INTO analysis_memo (stage, rules, digest, value, size, used_at) '
+            'VALUES (?, ?, ?, ?, ?, ?)',
+            [(stage, rules, digest, data, len(data), used_at)
+             for (stage, rules, digest), (data, used_at) in self._pending.items()])
+        self._pending = {}
+        self._flush_touched()
+        evicted = self._evict() if self._size > self.max_bytes else 0
+        self._conn.commit()
+        return evicted
+
+    def _flush_touched(self):
+        self._conn.executemany(
+            'UPDATE analysis_memo SET used_at = ? WHERE stage = ? AND rules = ? AND digest = ?', self._touched)
+        self._touched = []
+
+    def _stored_size(self):
+        return self._conn.execute('SELECT COALESCE(SUM(size), 0) FROM analysis_memo').fetchone()[0]
+
+    def _evict(self):
+        """Drop least recently used entries until the memo is back under 90% of its budget"""
+        # Other processes may have added or evicted entries since our running total was taken
+        self._size = self._stored_size()
+        excess = self._size - int(self.max_bytes * 0.9)
+        if excess <= 0:
+            return 0
+        evicted = []
+        for rowid, size in self._conn.execute('SELECT rowid, size FROM analysis_memo ORDER BY used_at'):
+            evicted.append((rowid,))
+            excess -= size
+            self._size -= size
+            if excess <= 0:
+                break
+        self._conn.executemany('DELETE FROM analysis_memo WHERE rowid = ?', evicted)
+        return len(evicted)
+
+    def flush(self):
+        """Write out new entries and the recency of recent hits; returns how many
+        entries were evicted"""
+        with self._lock:
+            return self._write()
+
+    def close(self):
+        self.flush()
+        self._conn.close()
+
+
+class SearchIndex:
+    """SQLite FTS5 full-text index over enriched posts, ranked with BM25.
+
+    Posts are only re-indexed when their indexed text changes, so re-running the
+    scraper against an existing index updates it instead of rebuilding it.
+    """
+    FIELDS = ('title', 'summary', 'key_points', 'takeaways', 'body')
+    # BM25 column weights, in FIELDS order: title matches count most, body text least
+    WEIGHTS = (10.0, 4.0, 3.0, 3.0, 1.0)
+
+    def __init__(self, path):
+        self.path = path
+        self.stats = Counter()
+        self._conn = sqlite3.connect(path)
+        self._conn.executescript(f"""
+            CREATE TABLE IF NOT EXISTS docs (
+                id INTEGER PRIMARY KEY,
+                url TEXT UNIQUE,
+                date TEXT,
+                categories TEXT,
+                content_hash TEXT
+            );
+            CREATE VIRTUAL TABLE IF NOT EXISTS docs_fts USING fts5(
+                {', '.join(self.FIELDS)}, tokenize='porter unicode61'
+            );
+        """)
+
+    def update(self, post):
+        """Add or refresh a post; unchanged posts are left alone"""
+        fields = (post.get('title') or '', post.get('summary') or '',
+                  '\n'.join(post.get('key_points') or []), '\n'.join(post.get('takeaways') or []),
+                  post.get('text') or '')
+        content_hash = hashlib.sha256('\0'.join(fields).encode('utf-8')).hexdigest()
+        row = self._conn.execute('SELECT id, content_hash FROM docs WHERE url = ?', (post['url'],)).fetchone()
+        if row and row[1] == content_hash:
+            self.stats['unchanged'] += 1
+            return
+        if row:
+            self._conn.execute('DELETE FROM docs_fts WHERE rowid = ?', (row[0],))
+            self._conn.execute('UPDATE docs SET date = ?, categories = ?, content_hash = ? WHERE id = ?',
+                               (post.get('date'), json.dumps(post.get('categories', [])), content_hash, row[0]))
+            doc_id = row[0]
+            self.stats['updated'] += 1
+        else:
+            doc_id = self._conn.execute(
+                'INSERT INTO docs (url, date, categories, content_hash) VALUES (?, ?, ?, ?)',
+                (post['url'], post.get('date'), json.dumps(post.get('categories', [])), content_hash)).lastrowid
+            self.stats['added'] += 1
+        self._conn.execute(f"INSERT INTO docs_fts (rowid, {', '.join(self.FIELDS)}) VALUES (?, ?, ?, ?, ?, ?)",
+                           (doc_id,) + fields)
+
+    def search(self, query, limit=10):
+        """Return the best matches for an FTS5 query as dicts with a highlighted snippet.
+
+        Queries that are not valid FTS5 syntax (e.g. `a/b testing`) are retried with
+        every term quoted.
+        """
+        sql = (f"SELECT d.url, f.title, d.date, d.categories, "
+               f"snippet(docs_fts, -1, '[', ']', '…', 12), bm25(docs_fts, {', '.join(map(str, self.WEIGHTS))}) AS score "
+               f"FROM docs_fts f JOIN docs d ON d.id = f.rowid WHERE docs_fts MATCH ? ORDER BY score LIMIT ?")
+        try:
+            rows = self._conn.execute(sql, (query, limit)).fetchall()
+        except sqlite3.OperationalError:
+            quoted = ' '.join('"' + term.replace('"', '""') + '"' for term in query.split())
+            rows = self._conn.execute(sql, (quoted, limit)).fetchall()
+        return [{'url': url, 'title': title, 'date': date, 'categories': json.loads(categories),
+                 'snippet': ' '.join(snippet.split()), 'score': -score}
+                for url, title, date, categories, snippet, score in rows]
+
+    def count(self):
+        """Number of indexed posts"""
+        return self._conn.execute('SELECT COUNT(*) FROM docs').fetchone()[0]
+
+    def close(self):
+        self._conn.commit()
+        self._conn.close()
+
+
+class Metrics:
+    """Thread-safe counters and stage timers for one run.
+
+    Timers also open an OpenTelemetry span when a tracer is given, and `log` writes
+    structured JSON lines when a log path is given.
+    """
+
+    def __init__(self, log_path=None, tracer=None):
+        self.counters = Counter()
+        self.timers = defaultdict(lambda: [0, 0.0, 0.0])  # name -> [count, total, max] seconds
+        self.tracer = tracer
+        self._lock = threading.Lock()
+        self._log = open(log_path, 'a', encoding='utf-8') if log_path else None
+
+    def incr(self, name, value=1):
+        with self._lock:
+            self.counters[name] += value
+
+    def observe(self, name, seconds):
+        with self._lock:
+            timer = self.timers[name]
+            timer[0] += 1
+            timer[1] += seconds
+            timer[2] = max(timer[2], seconds)
+
+    @contextlib.contextmanager
+    def timer(self, name):
+        """Time the enclosed block as stage `name`"""
+        span = self.tracer.start_as_current_span(name) if self.tracer else contextlib.nullcontext()
+        with span:
+            start = time.perf_counter()
+            try:
+                yield
+            finally:
+                self.observe(name, time.perf_counter() - start)
+
+    def log(self, event, **fields):
+        """Write one JSON log line, if a log file is configured"""
+        if self._log:
+            line = json.dumps({'ts': datetime.now(timezone.utc).isoformat(timespec='milliseconds'),
+                               'event': event, **fields}, ensure_ascii=False, default=str)
+            with self._lock:
+                self._log.write(line + '\n')
+
+    def snapshot(self):
+        with self._lock:
+            return {'counters': dict(self.counters),
+                    'timers': {name: {'count': count, 'total_s': round(total, 6), 'max_s': round(peak, 6)}
+                               for name, (count, total, peak) in self.timers.items()}}
+
+    def merge(self, snapshot):
+        """Add counters and timers collected elsewhere, e.g. in a CPU worker process"""
+        with self._lock:
+            self.counters.update(snapshot['counters'])
+            for name, timer in snapshot['timers'].items():
+                merged = self.timers[name]
+                merged[0] += timer['count']
+                merged[1] += timer['total_s']
+                merged[2] = max(merged[2], timer['max_s'])
+
+    def write_prometheus(self, path, prefix='statsig_scraper'):
+        """Write the metrics in the Prometheus text format, atomically so the node
+        exporter textfile collector never reads a partial file"""
+        snapshot = self.snapshot()
+        lines = []
+        for name, value in sorted(snapshot['counters'].items()):
+            metric = f"{prefix}_{re.sub(r'[^a-zA-Z0-9_]', '_', name)}_total"
+            lines += [f"# TYPE {metric} counter", f"{metric} {value}"]
+        lines.append(f"# TYPE {prefix}_stage_seconds summary")
+        for name, timer in sorted(snapshot['timers'].items()):
+            lines.append(f'{prefix}_stage_seconds_sum{{stage="{name}"}} {timer["total_s"]}')
+            lines.append(f'{prefix}_stage_seconds_count{{stage="{name}"}} {timer["count"]}')
+        lines.append(f"# TYPE {prefix}_stage_seconds_max gauge")
+        for name, timer in sorted(snapshot['timers'].items()):
+            lines.append(f'{prefix}_stage_seconds_max{{stage="{name}"}} {timer["max_s"]}')
+        lines += [f"# TYPE {prefix}_last_run_timestamp_seconds gauge",
+                  f"{prefix}_last_run_timestamp_seconds {time.time():.0f}"]
+        with AtomicFile(path) as f:
+            f.write('\n'.join(lines) + '\n')
+
+    def close(self):
+        if self._log:
+            self._log.close()
+            self._log = None
+
+
+class StackSampler:
+    """Sampling profiler: records the stacks of all threads at a fixed interval and
+    writes them in the folded format read by flamegraph.pl and speedscope"""
+
+    def __init__(self, interval=0.005):
+        self.interval = interval
+        self.stacks = Counter()
+        self._stop = threading.Event()
+        self._thread = threading.Thread(target=self._sample, daemon=True)
+
+    def _sample(self):
+        while not self._stop.wait(self.interval):
+            for thread_id, frame in sys._current_frames().items():
+                if thread_id == self._thread.ident:
+                    continue
+                stack = []
+                while frame is not None:
+                    code = frame.f_code
+                    stack.append(f"{code.co_name} ({os.path.basename(code.co_filename)}:{code.co_firstlineno})")
+                    frame = frame.f_back
+                self.stacks[';'.join(reversed(stack))] += 1
+
+    def start(self):
+        self._thread.start()
+
+    def stop(self, path):
+        self._stop.set()
+        self._thread.join()
+        with AtomicFile(path) as f:
+            for stack, count in self.stacks.most_common():
+                f.write(f"{stack} {count}\n")
+
+
+class HttpTransport:
+    """Shared HTTP client: connection pooling, timeouts, rate limiting and retries.
+
+    Connection errors, timeouts and 429/5xx responses are retried with exponential
+    backoff and full jitter; a Retry-After header sets the minimum wait. Every request
+    is recorded so a run can report retries and failures at the end.
+    """
+    RETRY_STATUSES = frozenset([429, 500, 502, 503, 504])
+
+    def __init__(self, headers=None, pool_size=4, connect_timeout=10.0, read_timeout=30.0,
+                 retries=3, backoff=0.5, max_backoff=60.0, rate_limiter=None, http2=False, metrics=None,
+                 host_scheduler=None):
+        self.rate_limiter = rate_limiter or RateLimiter(0)
+        self.host_scheduler = host_scheduler
+        self.metrics = metrics or Metrics()
+        self.timeout = (connect_timeout, read_timeout)
+        self.retries = max(0, retries)
+        self.backoff = backoff
+        self.max_backoff = max_backoff
+        self.http2 = http2
+        self.session = self._open_session(headers, pool_size, connect_timeout, read_timeout)
+        self.requests = {}  # url -> {'attempts', 'status', 'error', 'elapsed'}
+        self._lock = threading.Lock()
+
+    def _open_session(self, headers, pool_size, connect_timeout, read_timeout):
+        """Create the pooled client and set which of its errors are retried"""
+        if self.http2:
+            if httpx is None:
+                raise ImportError("HTTP/2 support requires httpx (pip install 'httpx[http2]')")
+            self._retry_errors = (httpx.TransportError,)
+            return httpx.Client(
+                http2=True, headers=headers, follow_redirects=True,
+                timeout=httpx.Timeout(read_timeout, connect=connect_timeout),
+                limits=httpx.Limits(max_connections=pool_size, max_keepalive_connections=pool_size))
+        session = requests.Session()
+        session.headers.update(headers or {})
+        # One pooled keep-alive connection per worker so concurrent fetches reuse sockets
+        adapter = HTTPAdapter(pool_connections=pool_size, pool_maxsize=pool_size)
+        session.mount('http://', adapter)
+        session.mount('https://', adapter)
+        self._retry_errors = (requests.ConnectionError, requests.Timeout)
+        return session
+
+    def get(self, url, headers=None, stream=False):
+        """GET `url`, retrying transient failures; raises once retries are exhausted
+        or the server answers with an error status.
+
+        With `stream` the body is left unread: read it with `iter_chunks` and close
+        the response when done.
+        """
+        start = time.monotonic()
+        attempt = 0
+        while True:
+            attempt += 1
+            with self.metrics.timer('http.rate_limit_wait'):
+                self.rate_limiter.acquire(url)
+            try:
+                if self.host_scheduler:
+                    with self.host_scheduler.slot(url):
+                        response, ttfb = self._send(url, headers, stream)
+                else:
+                    response, ttfb = self._send(url, headers, stream)
+            except self._retry_errors as e:
+                if attempt > self.retries:
+                    self._record(url, attempt, None, e, start)
+                    raise
+                delay = self._backoff_delay(attempt)
+            else:
+                if response.status_code in self.RETRY_STATUSES and attempt <= self.retries:
+                    delay = max(self._backoff_delay(attempt), self._retry_after(response))
+                    response.close()
+                else:
+                    try:
+                        error = None
+                        if response.status_code >= 400:
+                            error = f"HTTP {response.status_code}"
+                        self.metrics.observe('http.ttfb', ttfb)
+                        self._record(url, attempt, response.status_code, error, start,
+                                     0 if stream else len(response.content))
+                        response.raise_for_status()
+                    except BaseException:
+                        # An unclosed streamed response would keep its pooled connection
+                        response.close()
+                        raise
+                    return response
+            self.metrics.incr('http.retries')
+            time.sleep(delay)
+
+    def _send(self, url, headers, stream=False):
+        """Send the request; returns the response and the seconds until its headers
+        arrived (DNS, connect, TLS and server time)"""
+        if self.http2:
+            # httpx only sets response.elapsed once the body is read, so time the send here
+            sent = time.monotonic()
+            response = self.session.send(self.session.build_request('GET', url, headers=headers), stream=True)
+            ttfb = time.monotonic() - sent
+            if not stream:
+                try:
+                    response.read()
+                finally:
+                    response.close()
+            return response, ttfb
+        response = self.session.get(url, headers=headers, timeout=self.timeout, stream=stream)
+        return response, response.elapsed.total_seconds()
+
+    def iter_chunks(self, response, chunk_size=8192):
+        """Iterate over the body of a streamed response"""
+        if self.http2:
+            return response.iter_bytes(chunk_size)
+        return response.iter_content(chunk_size)
+
+    def _backoff_delay(self, attempt):
+        return random.uniform(0, min(self.max_backoff, self.backoff * 2 ** (attempt - 1)))
+
+    def _retry_after(self, response):
+        """Seconds requested by a Retry-After header (delta-seconds or HTTP date)"""
+        value = response.headers.get('Retry-After')
+        if not value:
+            return 0.0
+        try:
+            seconds = float(value)
+        except ValueError:
+            try:
+                when = email.utils.parsedate_to_datetime(value)
+            except (TypeError, ValueError):
+                return 0.0
+            if when.tzinfo is None:
+                when = when.replace(tzinfo=timezone.utc)
+            seconds = (when - datetime.now(timezone.utc)).total_seconds()
+        return min(self.max_backoff, max(0.0, seconds))
+
+    def _record(self, url, attempts, status, error, start, size=0):
+        elapsed = time.monotonic() - start
+        with self._lock:
+            self.requests[url] = {
+                'attempts': attempts,
+                'status': status,
+                'error': str(error) if error else None,
+                'elapsed': round(elapsed, 3),
+                'bytes': size,
+            }
+        self.metrics.observe('http.request', elapsed)
+        self.metrics.incr('http.requests')
+        self.metrics.incr('http.bytes', size)
+        if error:
+            self.metrics.incr('http.failures')
+        self.metrics.log('request', url=url, status=status, attempts=attempts, bytes=size,
+                         seconds=round(elapsed, 4), error=str(error) if error else None)
+
+    def report(self, hosts=None):
+        """Summary of all requests, or of those to `hosts`: totals, retried URLs and failures"""
+        entries = self.requests_to(hosts)
+        return {
+            'requests': len(entries),
+            'attempts': sum(entry['attempts'] for entry in entries.values()),
+            'bytes': sum(entry['bytes'] for entry in entries.values()),
+            'retried': {url: entry for url, entry in entries.items() if entry['attempts'] > 1},
+            'failed': {url: entry for url, entry in entries.items() if entry['error']},
+        }
+
+    def requests_to(self, hosts=None):
+        """Per-request log entries, limited to URLs on `hosts` when given"""
+        with self._lock:
+            if hosts is None:
+                return dict(self.requests)
+            return {url: entry for url, entry in self.requests.items() if urlparse(url).netloc in hosts}
+
+    def close(self):
+        self.session.close()
+
+
+class AsyncHttpTransport(HttpTransport):
+    """asyncio flavour of HttpTransport on a single httpx.AsyncClient.
+
+    At most `pool_size` requests are in flight at once; further callers wait on a
+    semaphore. Retries, backoff, Retry-After and metrics work as in HttpTransport.
+    Cancelling the calling task aborts its request and frees its slot.
+    """
+
+    def _open_session(self, headers, pool_size, connect_timeout, read_timeout):
+        if httpx is None:
+            raise ImportError("The async crawler requires httpx (pip install httpx)")
+        self._in_flight = asyncio.Semaphore(pool_size)
+        self._retry_errors = (httpx.TransportError,)
+        return httpx.AsyncClient(
+            http2=self.http2, headers=headers, follow_redirects=True,
+            timeout=httpx.Timeout(read_timeout, connect=connect_timeout),
+            limits=httpx.Limits(max_connections=pool_size, max_keepalive_connections=pool_size))
+
+    async def get(self, url, headers=None, timeout=None):
+        """GET `url`, retrying transient failures; raises once retries are exhausted
+        or the server answers with an error status.
+
+        `timeout` caps the whole call, retries and backoff included, and raises
+        TimeoutError when it runs out.
+        """
+        start = time.monotonic()
+        deadline = start + timeout if timeout else None
+        attempt = 0
+        while True:
+            attempt += 1
+            with self.metrics.timer('http.rate_limit_wait'):
+                await self.rate_limiter.acquire_async(url)
+            try:
+                async with self._in_flight:
+                    remaining = deadline - time.monotonic() if deadline else None
+                    response = await asyncio.wait_for(self.session.get(url, headers=headers), remaining)
+            except asyncio.TimeoutError:
+                error = TimeoutError(f"no response within {timeout}s")
+                self._record(url, attempt, None, error, start)
+                raise error from None
+            except self._retry_errors as e:
+                if attempt > self.retries:
+                    self._record(url, attempt, None, e, start)
+                    raise
+                delay = self._backoff_delay(attempt)
+            else:
+                if response.status_code in self.RETRY_STATUSES and attempt <= self.retries:
+                    delay = max(self._backoff_delay(attempt), self._retry_after(response))
+                else:
+                    error = None
+                    if response.status_code >= 400:
+                        error = f"HTTP {response.status_code}"
+                    self.metrics.observe('http.ttfb', response.elapsed.total_seconds())
+                    self._record(url, attempt, response.status_code, error, start, len(response.content))
+                    response.raise_for_status()
+                    return response
+            if deadline and time.monotonic() + delay >= deadline:
+                error = TimeoutError(f"no response within {timeout}s")
+                self._record(url, attempt, None, error, start)
+                raise error
+            self.metrics.incr('http.retries')
+            await asyncio.sleep(delay)
+
+    async def close(self):
+        await self.session.aclose()
+
+
+def bounded_map(executor, fn, iterable, window):
+    """Like executor.map, but pulls from `iterable` lazily and keeps at most `window`
+    calls in flight, so a slow consumer holds back the producer instead of buffering"""
+    pending = deque()
+    for item in iterable:
+        pending.append(executor.submit(fn, item))
+        if len(pending) >= window:
+            yield pending.popleft().result()
+    while pending:
+        yield pending.popleft().result()
+
+
+def batched(iterable, size):
+    """Split `iterable` into lists of up to `size` items"""
+    iterator = iter(iterable)
+    while batch := list(islice(iterator, size)):
+        yield batch
+
+
+# Prose of the markdown knowledge base, formatted with the site profile's title
+KNOWLEDGE_BASE_OVERVIEW = """
+This knowledge base contains deep insights from the {title}, organized for maximum utility in AI-assisted development workflows. Each article includes:
+
+- **Comprehensive summaries** with context and background
+- **Concrete examples** and real-world use cases  
+- **Quantitative data points** and performance metrics
+- **Actionable takeaways** you can apply immediately
+- **Direct source links** for deeper exploration
+
+Use this resource to inform technical decisions, learn best practices, and understand proven patterns in the topics listed below.
+"""
+AI_USAGE_GUIDE = """
+### How to Leverage This Knowledge Base
+
+**For Users (Prompting Strategies):**
+
+1. **Be Specific with Context**
+   - ❌ "Tell me about A/B testing"
+   - ✅ "Based on the {title} articles on A/B testing, what are best practices for handling multiple variants with traffic imbalance?"
+
+2. **Reference Examples and Data**
+   - ❌ "How do I optimize performance?"
+   - ✅ "What performance optimization techniques does the {title} describe? Include specific metrics from the engineering articles."
+
+3. **Ask for Comparisons**
+   - "Compare feature flag strategies vs. experimentation approaches mentioned in the articles"
+   - "What are the tradeoffs between approaches mentioned in [Article X] vs [Article Y]?"
+
+4. **Request Actionable Guidance**
+   - "Based on the case studies, give me a step-by-step plan to implement [feature]"
+   - "What are the top 5 takeaways from the product analytics category that apply to [my scenario]?"
+
+**For AI Assistants (How to Use This Context):**
+
+1. **Cite Sources**
+   - Always reference specific articles when drawing insights
+   - Include URLs so users can read full details
+   - Quote data points and metrics accurately
+
+2. **Synthesize Across Articles**
+   - Combine insights from multiple articles in the same category
+   - Identify patterns and common themes
+   - Note when articles present different perspectives
+
+3. **Prioritize Concrete Information**
+   - Lead with examples and data points
+   - Highlight actionable takeaways
+   - Explain technical concepts using examples from the articles
+
+4. **Acknowledge Limitations**
+   - Note when information is dated (check article dates)
+   - Indicate when a topic isn't covered in the knowledge base
+   - Suggest areas where the user should consult current documentation
+
+### Category-Specific Use Cases
+
+"""
+
+
+class MarkdownRenderer:
+    """Renders the markdown knowledge base of a run.
+
+    Category headings, anchors and counts are computed once up front, and each post
+    body is rendered once and reused in every category that lists the post. With
+    `workers` > 1 categories are rendered into separate buffers on a thread pool
+    and emitted in order, so the document is the same either way.
+    """
+
+    def __init__(self, scraper, categorized_posts, workers=1, reuse_bodies=True):
+        self.scraper = scraper
+        self.categorized = categorized_posts
+        self.workers = max(1, workers)
+        self.prompts = scraper.get_category_prompts()
+        self.now = datetime.now()
+        # (name, anchor, "N article(s)") per category, in output order
+        self.categories = []
+        for category in sorted(categorized_posts):
+            count = len(categorized_posts[category])
+            anchor = category.lower().replace(' ', '-').replace('&', '').replace('--', '-')
+            self.categories.append((category, anchor, f"{count} article{'s' if count != 1 else ''}"))
+        self.total = sum(len(posts) for posts in categorized_posts.values())
+        # Rendered post bodies by URL; streaming runs render again rather than hold them all
+        self._bodies = {} if reuse_bodies else None
+        self._lock = threading.Lock()
+
+    def post_body(self, post):
+        """Markdown of a post below its heading, rendered once per post"""
+        if self._bodies is None:
+            return '\n'.join(self.scraper.iter_post_markdown(post))
+        body = self._bodies.get(post.url)
+        if body is None:
+            body = '\n'.join(self.scraper.iter_post_markdown(post))
+            with self._lock:
+                self._bodies[post.url] = body
+        return body
+
+    def iter_category(self, category):
+        """Yield the pieces of one category section"""
+        name, _, articles = category
+        yield f"\n## {name}\n"
+        yield f"*{articles}*\n"
+        if name in self.prompts:
+            yield "\n### 💡 Suggested Questions for This Category\n"
+            for prompt in self.prompts[name]:
+                yield f"- {prompt}\n"
+            yield "\n"
+        for i, post in enumerate(self.categorized[name], 1):
+            yield f"\n### {i}. {post.title}\n"
+            yield self.post_body(post)
+            yield "\n---\n"
+
+    def render_category(self, category):
+        """One category section as a single string"""
+        return '\n'.join(self.iter_category(category))
+
+    def iter_pieces(self):
+        """Yield the document in pieces that are joined with newlines"""
+        yield f"# {self.scraper.profile.title} Knowledge Base\n"
+        yield "## Comprehensive Guide for AI-Assisted Development\n"
+        yield f"*Generated: {self.now.strftime('%Y-%m-%d %H:%M:%S')}*\n"
+        yield f"*Total Articles: {self.total}*\n"
+        yield f"*Categories: {len(self.categories)}*\n"
+        yield "\n---\n"
+        yield "\n## 📋 Overview\n"
+        yield KNOWLEDGE_BASE_OVERVIEW.format(title=self.scraper.profile.title)
+        
+        yield "\n## 📚 Table of Contents\n"
+        for name, anchor, articles in self.categories:
+            yield f"- [{name}](#{anchor}) — {articles}\n"
+        yield "\n---\n"
+        
+        if self.workers > 1 and len(self.categories) > 1:
+            with ThreadPoolExecutor(max_workers=self.workers) as executor:
+                yield from executor.map(self.render_category, self.categories)
+        else:
+            for category in self.categories:
+                yield from self.iter_category(category)
+        
+        yield "\n## 🤖 AI Assistant Usage Guide\n"
+        yield AI_USAGE_GUIDE.format(title=self.scraper.profile.title)
+        for name, _, articles in self.categories:
+            yield f"**{name}** ({articles})\n"
+            if name in self.prompts:
+                yield "Example prompts:\n"
+                for prompt in self.prompts[name][:2]:
+                    yield f"  - {prompt}\n"
+            yield "\n"
+        
+        yield "\n### 📌 Quick Reference\n"
+        yield f"- **Total Knowledge Base Size**: ~{self.total} articles\n"
+        yield f"- **Coverage Areas**: {', '.join(name for name, _, _ in self.categories)}\n"
+        yield f"- **Last Updated**: {self.now.strftime('%Y-%m-%d')}\n"
+        yield "\n---\n"
+        yield "\n*End of Knowledge Base*\n"
+
+
+class RunOutputs:
+    """Everything one run writes: record files, search index, markdown and shards.
+
+    Enriched posts are passed to `add` one at a time in output order; `close`
+    renders the collected categories and prints where everything went.
+    """
+
+    def __init__(self, scraper, output_file, formats=('markdown',), search_index=None, shard_dir=None,
+                 shard_budget=100000, shard_unit='tokens'):
+        self.scraper = scraper
+        self.metrics = scraper.metrics
+        self.output_file = output_file
+        self.formats = formats
+        self.shard_dir = shard_dir or os.path.splitext(output_file)[0] + '_shards'
+        self.related_file = os.path.splitext(output_file)[0] + '_related.json'
+        self.shard_budget = shard_budget
+        self.shard_unit = shard_unit
+        self.writers = self.open_writers(output_file, formats)
+        self.index = SearchIndex(search_index) if search_index else None
+        # Categories hold compact PostRecords; in streaming mode the records are
+        # spooled to disk and only their spool positions are kept per category.
+        self.spool = PostSpool() if scraper.stream else None
+        self.categorized = defaultdict(list)
+        self.processed = 0
+        self.duplicates = 0
+
+    @staticmethod
+    def open_writers(output_file, formats):
+        """Record writers for `formats`; they share the markdown file's name with their own extension"""
+        base_path = os.path.splitext(output_file)[0]
+        return [RECORD_WRITERS[fmt](base_path + RECORD_WRITERS[fmt].extension)
+                for fmt in formats if fmt in RECORD_WRITERS]
+
+    def add(self, enriched):
+        self.processed += 1
+        dedup = self.scraper.dedup
+        match = None
+        if dedup:
+            with self.metrics.timer('dedup'):
+                match = dedup.add(enriched['url'], enriched['title'], enriched.get('text'))
+        if match:
+            self.duplicates += 1
+            enriched['duplicate_of'] = match[0]
+        if self.writers:
+            record = export_record(enriched)
+            for writer in self.writers:
+                writer.write(record)
+        if self.index:
+            with self.metrics.timer('index'):
+                self.index.update(enriched)
+        if match and self.scraper.dedup_mode == 'collapse':
+            return
+        if self.scraper.related:
+            self.scraper.related.add(enriched['url'], enriched['title'], enriched.get('text', ''))
+        # Only the compact record outlives this call; the raw text goes with `enriched`
+        record = PostRecord.from_post(enriched)
+        entry = self.spool.append(record) if self.spool else record
+        for category in record.categories:
+            self.categorized[category].append(entry)
+
+    def discard(self):
+        """Drop the record files being written after a failed run, leaving the
+        previous outputs in place"""
+        for writer in self.writers:
+            writer.discard()
+        if self.spool:
+            self.spool.close()
+
+    def close(self):
+        """Render and close all outputs; returns the number of posts processed"""
+        scraper = self.scraper
+        categorized = self.categorized
+        if self.spool:
+            categorized = {category: self.spool.posts(indexes) for category, indexes in categorized.items()}
+        
+        for writer in self.writers:
+            writer.close()
+        if self.index:
+            self.index.close()
+        related = scraper.related
+        if related:
+            with self.metrics.timer('related'):
+                related.update()
+            related.write_adjacency(self.related_file)
+            related.close()
+        
+        # Write markdown section by section
+        if 'markdown' in self.formats:
+            with self.metrics.timer('render'):
+                scraper.write_markdown(categorized, self.output_file)
+        if 'shards' in self.formats:
+            with self.metrics.timer('render.shards'):
+                manifest = scraper.write_shards(categorized, self.shard_dir, self.shard_budget, self.shard_unit)
+        if self.spool:
+            self.spool.close()
+        
+        if 'markdown' in self.formats:
+            print(f"\n✓ Summary saved to {self.output_file}")
+        if 'shards' in self.formats:
+            print(f"✓ {manifest['articles']} articles in {len(manifest['shards'])} shards saved to {self.shard_dir}")
+        for writer in self.writers:
+            print(f"✓ Records saved to {writer.path}")
+        if self.index:
+            stats = self.index.stats
+            print(f"✓ Search index {self.index.path}: {stats['added']} added, {stats['updated']} updated, "
+                  f"{stats['unchanged']} unchanged")
+        if related:
+            stats = related.stats
+            print(f"✓ Related posts: {stats['scored']} posts scored ({stats['added']} added, {stats['changed']} changed, "
+                  f"{stats['unchanged']} unchanged); adjacency saved to {self.related_file}")
+        print(f"✓ Processed {self.processed} posts")
+        print(f"✓ Found {len(categorized)} categories")
+        if scraper.dedup:
+            print(f"✓ Near-duplicates: {self.duplicates} posts in {len(scraper.dedup.duplicates)} clusters "
+                  f"({'collapsed' if scraper.dedup_mode == 'collapse' else 'flagged'})")
+        return self.processed
+
+
+class CheckpointPosts:
+    """Enriched posts of an interrupted run by URL, read back from the checkpoint
+    log on access; only each post's offset in the log is kept in memory"""
+
+    def __init__(self, path, offsets=None):
+        self.path = path
+        self._offsets = offsets or {}
+        self._file = None
+        self._lock = threading.Lock()
+
+    def __contains__(self, url):
+        return url in self._offsets
+
+    def __len__(self):
+        return len(self._offsets)
+
+    def __iter__(self):
+        return iter(self._offsets)
+
+    def __getitem__(self, url):
+        return json.loads(self.line(url))
+
+    def line(self, url):
+        """The logged line of `url`, as text"""
+        offset = self._offsets[url]
+        with self._lock:
+            if self._file is None:
+                self._file = open(self.path, 'rb')
+            self._file.seek(offset)
+            return self._file.readline().decode('utf-8')
+
+    def relocate(self, offsets):
+        """Point at the entries of a rewritten log"""
+        self.close()
+        self._offsets = offsets
+
+    def close(self):
+        with self._lock:
+            if self._file:
+                self._file.close()
+                self._file = None
+
+
+class Checkpoint:
+    """Progress log of a run, so an interrupted run can resume where it stopped.
+
+    The first line holds the discovered posts and every further line one enriched
+    post, appended as posts complete. The log is forced to disk every `interval`
+    posts, so a crash loses at most that much work; a line torn by the crash is
+    dropped on resume. The log is removed once the run's outputs are in place.
+    Resumed posts are read back from the log as they are needed.
+    """
+    version = 1
+
+    def __init__(self, path, interval=25):
+        self.path = path
+        self.interval = max(1, interval)
+        self.posts = None
+        self.resumed = CheckpointPosts(path)  # url -> enriched post logged by the interrupted run
+        self._file = None
+        self._unsynced = 0
+
+    def load(self):
+        """Read the log of an interrupted run; False when there is no usable one"""
+        header = None
+        offsets = {}
+        try:
+            with open(self.path, 'rb') as f:
+                while True:
+                    offset = f.tell()
+                    line = f.readline()
+                    if not line.endswith(b'\n'):
+                        break
+                    try:
+                        entry = json.loads(line)
+                    except ValueError:
+                        break
+                    if header is None:
+                        header = entry
+                        if header.get('checkpoint') != self.version:
+                            return False
+                    else:
+                        offsets[entry['url']] = offset
+        except FileNotFoundError:
+            return False
+        if header is None:
+            return False
+        self.posts = header['posts']
+        self.resumed.relocate(offsets)
+        return True
+
+    def start(self, posts):
+        """Begin the log with `posts`, keeping the entries of a loaded log"""
+        self.posts = posts
+        header = json.dumps({'checkpoint': self.version, 'posts': posts}, ensure_ascii=False) + '\n'
+        position = len(header.encode('utf-8'))
+        offsets = {}
+        with AtomicFile(self.path) as f:
+            f.write(header)
+            for url in self.resumed:
+                line = self.resumed.line(url)
+                f.write(line)
+                offsets[url] = position
+                position += len(line.encode('utf-8'))
+        self.resumed.relocate(offsets)
+        self._file = open(self.path, 'a', encoding='utf-8')
+
+    def record(self, enriched):
+        """Log an enriched post unless it was resumed from the log"""
+        if enriched['url'] in self.resumed:
+            return
+        self._file.write(json.dumps(enriched, ensure_ascii=False) + '\n')
+        self._unsynced += 1
+        if self._unsynced >= self.interval:
+            self._file.flush()
+            os.fsync(self._file.fileno())
+            self._unsynced = 0
+
+    def track(self, enriched_posts):
+        """Pass enriched posts through, logging each one"""
+        for enriched in enriched_posts:
+            self.record(enriched)
+            yield enriched
+
+    def complete(self):
+        """Remove the log after a successful run"""
+        if self._file:
+            self._file.close()
+            self._file = None
+        self.resumed.close()
+        os.remove(self.path)
+
+
+# CPU stage worker processes each build their own scraper once, see StatsigBlogScraper.iter_pooled
+_cpu_scraper = None
+
+
+def _init_cpu_worker(parser, min_category_hits, memo_path=None, memo_max_bytes=None, profile=None):
+    global _cpu_scraper
+    _cpu_scraper = StatsigBlogScraper(parser=parser, min_category_hits=min_category_hits,
+                                      requests_per_second=0, memo_path=memo_path, memo_max_bytes=memo_max_bytes,
+                                      profile=profile)
+
+
+def _analyze_pages(pages):
+    """Parse, categorize and summarize a batch of (post, html) pairs in a worker process.
+
+    Returns a (content, analysis) pair per page, (None, None) for pages that fail,
+    and the batch's metrics.
+    """
+    _cpu_scraper.metrics = Metrics()
+    results = []
+    for post, html in pages:
+        try:
+            content = _cpu_scraper.parse_post_content(html)
+            results.append((content, _cpu_scraper.compute_analysis(dict(post, **content))))
+        except Exception as e:
+            print(f"Error parsing {post['url']}: {e}")
+            results.append((None, None))
+    if _cpu_scraper.memo:
+        _cpu_scraper.metrics.incr('memo.evicted', _cpu_scraper.memo.flush())
+    return results, _cpu_scraper.metrics.snapshot()
+
+
+REQUEST_HEADERS = {'User-Agent': 'Mozilla/5.0 (Macintosh; Intel Mac OS X 10_15_7) AppleWebKit/537.36'}
+
 
 class StatsigBlogScraper:
-    def __init__(self, base_url="https://statsig.com"):
-        self.base_url = base_url
-        self.session = requests.Session()
-        self.session.headers.update({
-            'User-Agent': 'Mozilla/5.0 (Macintosh; Intel Mac OS X 10_15_7) AppleWebKit/537.36'
-        })
-        
-    def fetch_all_posts(self):
-        """Fetch all blog post links from the main blog page"""
-        print("Fetching blog post list...")
-        url = f"{self.base_url}/blog/all"
-        response = self.session.get(url)
-        soup = BeautifulSoup(response.content, 'html.parser')
+    # Bump whenever categorize_post/summarize_post output changes so cached analysis is redone
+    ANALYSIS_VERSION = 4
+    transport_class = HttpTransport
+
+    def __init__(self, base_url="https://statsig.com", workers=4, requests_per_second=2.0,
+                 cache_path=None, parser='html.parser', min_category_hits=1, stream=False,
+                 connect_timeout=10.0, read_timeout=30.0, retries=3, backoff=0.5, pool_size=None,
+                 http2=False, discovery='index', discovery_url=None, incremental=False,
+                 cpu_workers=0, cpu_batch_size=8, dedup=None, dedup_threshold=0.8,
+                 metrics_log=None, otel=False, metadata=None, memo_path=None, memo_max_bytes=None,
+                 render_workers=1, summarizer='heuristic', related=0, related_path=None,
+                 profile=None, transport=None, cache=None, memo=None):
+        if discovery not in DISCOVERY_METHODS:
+            raise ValueError(f"Unknown discovery method {discovery!r}; choose from {', '.join(DISCOVERY_METHODS)}")
+        if incremental and not (cache_path or cache):
+            raise ValueError("Incremental runs need a cache of the previous run (cache_path)")
+        if metadata and metadata not in METADATA_MODES:
+            raise ValueError(f"Unknown metadata mode {metadata!r}; choose from {', '.join(METADATA_MODES)}")
+        if metadata == 'first' and not (cache_path or cache):
+            raise ValueError("Metadata-first runs compare against the cache (cache_path)")
+        if dedup and dedup not in DEDUP_MODES:
+            raise ValueError(f"Unknown dedup mode {dedup!r}; choose from {', '.join(DEDUP_MODES)}")
+        if summarizer not in SUMMARIZERS:
+            raise ValueError(f"Unknown summarizer {summarizer!r}; choose from {', '.join(SUMMARIZERS)}")
+        if parser not in PARSER_BACKENDS:
+            raise ValueError(f"Unknown parser backend {parser!r}; choose from {', '.join(PARSER_BACKENDS)}")
+        # A profile, transport, cache or memo passed in is shared with the scrapers
+        # of other sites, see SiteScheduler
+        self.profile = profile or SiteProfile(STATSIG_PROFILE.name, base_url, title=STATSIG_PROFILE.title)
+        self.base_url = self.profile.base_url
+        self.parser = parser
+        self.stream = stream
+        self.discovery = discovery
+        self.discovery_url = discovery_url
+        self.incremental = incremental
+        self.metadata = metadata
+        self.dedup_mode = dedup
+        self.dedup = NearDuplicateDetector(dedup_threshold) if dedup else None
+        self.max_index_pages = 100
+        self.category_keywords = self.profile.category_keywords
+        self.keyword_matcher = KeywordMatcher(self.category_keywords)
+        self.min_category_hits = max(1, min_category_hits)
+        if cache:
+            self.cache = cache
+            self.cache_scope = self.base_url + '/'  # other sites' posts share the cache
+        else:
+            self.cache = PostCache(cache_path) if cache_path else None
+            self.cache_scope = None
+        if memo:
+            self.memo, self.memo_path, self.memo_max_bytes = memo, memo.path, memo.max_bytes
+        else:
+            self.memo_path = memo_path
+            self.memo_max_bytes = memo_max_bytes or 64 * 1024 * 1024
+            self.memo = AnalysisMemo(memo_path, self.memo_max_bytes) if memo_path else None
+        self.analysis_rules = {
+            # Categories are reported in taxonomy order, so a profile that only reorders
+            # its taxonomy still gets a new fingerprint
+            'categorize': rules_fingerprint(self.ANALYSIS_VERSION, list(self.category_keywords.items()),
+                                            self.min_category_hits),
+            'summarize': rules_fingerprint(self.ANALYSIS_VERSION, SUMMARY_PATTERNS),
+        }
+        # Cached analysis is only reused when both stages' rules are unchanged
+        self.analysis_key = rules_fingerprint(self.analysis_rules)
+        self.workers = max(1, workers)
+        self.cpu_workers = max(0, cpu_workers)
+        self.cpu_batch_size = max(1, cpu_batch_size)
+        self.render_workers = max(1, render_workers)
+        self.summarizer = summarizer
+        self.corpus_summarizer = CorpusSummarizer(summarizer) if summarizer != 'heuristic' else None
+        self.related = RelatedPosts(related_path, related) if related else None
+        tracer = otel_trace.get_tracer('statsig_blog_scraper') if otel and otel_trace else None
+        self.metrics = Metrics(metrics_log, tracer)
+        self.shared_transport = transport is not None
+        if transport:
+            self.transport = transport
+            self.rate_limiter = transport.rate_limiter
+        else:
+            self.rate_limiter = RateLimiter(requests_per_second)
+            self.transport = self.transport_class(
+                headers=REQUEST_HEADERS, pool_size=pool_size or self.workers, connect_timeout=connect_timeout,
+                read_timeout=read_timeout, retries=retries, backoff=backoff,
+                rate_limiter=self.rate_limiter, http2=http2, metrics=self.metrics)
+        self.session = self.transport.session
         
-        # Find all blog post links
+    def discover_posts(self, known=None):
+        """Find blog posts with the configured discovery method.
+
+        `known` maps URLs seen in a previous run to when they were fetched. When it is
+        given, discovery stops as soon as it only finds already-seen posts and skips
+        sitemap/feed entries that have not changed since they were fetched.
+        """
+        if self.discovery == 'sitemap':
+            return self.discover_from_sitemap(self.discovery_url or self.profile.sitemap_url, known)
+        if self.discovery == 'feed':
+            return self.discover_from_feed(self.discovery_url or self.profile.feed_url, known)
+        return self.fetch_all_posts(known)
+
+    def fetch_all_posts(self, known=None):
+        """Fetch all blog post links from the site's index pages, following rel="next" pagination"""
+        print("Fetching blog post list...")
         posts = []
-        links = soup.find_all('a', href=re.compile(r'^/blog/[^/]+$'))
-        
         seen_urls = set()
+        visited_pages = set()
+        for url in self.index_urls():
+            while url and url not in visited_pages and len(visited_pages) < self.max_index_pages:
+                visited_pages.add(url)
+                response = self.transport.get(url)
+                page_posts, next_url = self.parse_index_page(response.content, url, seen_urls)
+                posts.extend(page_posts)
+                
+                # The index is newest first: a page without unseen posts means we have caught up
+                if known is not None and not any(post['url'] not in known for post in page_posts):
+                    break
+                url = next_url
+        
+        return self.report_discovered(posts, known)
+
+    def index_urls(self):
+        """First pages of the indexes that list the site's posts"""
+        return [self.discovery_url] if self.discovery_url else self.profile.index_urls
+
+    def parse_index_page(self, html, page_url, seen_urls):
+        """Blog post links on one index page that are not in `seen_urls` (which is
+        updated), and the URL of the next index page or None"""
+        soup = BeautifulSoup(html, self.parser)
+        
+        # Find all blog post links
+        page_posts = []
+        links = soup.find_all('a', href=self.profile.link_re)
         for link in links:
             href = link.get('href')
-            if href and href != '/blog/all' and href not in seen_urls:
+            if href and href not in seen_urls:
                 full_url = urljoin(self.base_url, href)
                 title = link.get_text(strip=True)
                 if title and len(title) > 5:  # Filter out empty or very short titles
-                    posts.append({'url': full_url, 'slug': href, 'title': title})
+                    slug = href if href.startswith('/') else urlparse(full_url).path
+                    page_posts.append({'url': full_url, 'slug': slug, 'title': title})
                     seen_urls.add(href)
         
-        print(f"Found {len(posts)} blog posts")
+        next_link = soup.find(['link', 'a'], rel='next', href=True)
+        return page_posts, urljoin(page_url, next_link['href']) if next_link else None
+
+    def report_discovered(self, posts, known=None):
+        """Drop already-known posts and print how many were found"""
+        if known is not None:
+            posts = [post for post in posts if post['url'] not in known]
+            print(f"Found {len(posts)} new blog posts")
+        else:
+            print(f"Found {len(posts)} blog posts")
+        return posts
+
+    def discover_from_sitemap(self, sitemap_url, known=None):
+        """Collect blog post URLs and lastmod dates from a sitemap or sitemap index"""
+        print(f"Reading sitemap {sitemap_url}...")
+        posts = []
+        seen_urls = set()
+        pending = [sitemap_url]
+        while pending:
+            root = ElementTree.fromstring(self.transport.get(pending.pop(0)).content)
+            if _xml_name(root) == 'sitemapindex':
+                for entry in root:
+                    loc, lastmod = _xml_child_text(entry, 'loc'), _parse_lastmod(_xml_child_text(entry, 'lastmod'))
+                    # Child sitemaps untouched since the last run cannot contain new posts
+                    if loc and not (known and lastmod and lastmod <= min(known.values())):
+                        pending.append(loc)
+                continue
+            for entry in root:
+                loc = _xml_child_text(entry, 'loc')
+                if not loc or loc in seen_urls or not self.profile.is_post_path(urlparse(loc).path):
+                    continue
+                seen_urls.add(loc)
+                lastmod = _parse_lastmod(_xml_child_text(entry, 'lastmod'))
+                if known and loc in known and (lastmod is None or lastmod <= known[loc]):
+                    continue
+                posts.append({'url': loc, 'slug': urlparse(loc).path, 'title': urlparse(loc).path,
+                              'lastmod': lastmod.isoformat() if lastmod else None})
+        print(f"Found {len(posts)} {'new or updated ' if known is not None else ''}blog posts")
+        return posts
+
+    def discover_from_feed(self, feed_url, known=None):
+        """Collect blog posts from an RSS or Atom feed, following Atom rel="next" pages"""
+        print(f"Reading feed {feed_url}...")
+        posts = []
+        seen_urls = set()
+        visited_pages = set()
+        url = feed_url
+        while url and url not in visited_pages and len(visited_pages) < self.max_index_pages:
+            visited_pages.add(url)
+            root = ElementTree.fromstring(self.transport.get(url).content)
+            channel = next((child for child in root if _xml_name(child) == 'channel'), root)
+            caught_up = False
+            next_url = None
+            for entry in channel:
+                name = _xml_name(entry)
+                if name == 'link' and entry.get('rel') == 'next':
+                    next_url = urljoin(url, entry.get('href'))
+                if name not in ('item', 'entry'):
+                    continue
+                link = _feed_entry_link(entry)
+                if not link or link in seen_urls or not self.profile.is_post_path(urlparse(link).path):
+                    continue
+                seen_urls.add(link)
+                updated = _parse_lastmod(_xml_child_text(entry, 'updated') or _xml_child_text(entry, 'pubDate')
+                                         or _xml_child_text(entry, 'published'))
+                if known and link in known and (updated is None or updated <= known[link]):
+                    # Feeds are newest first: everything after this entry was seen before
+                    caught_up = True
+                    break
+                posts.append({'url': link, 'slug': urlparse(link).path,
+                              'title': _xml_child_text(entry, 'title') or urlparse(link).path,
+                              'lastmod': updated.isoformat() if updated else None})
+            url = None if caught_up else next_url
+        print(f"Found {len(posts)} {'new or updated ' if known is not None else ''}blog posts")
         return posts
     
+    def fetch_post_page(self, post_url, headers=None):
+        """Download a single post page through the rate-limited, retrying transport"""
+        return self.transport.get(post_url, headers=headers)
+
+    def fetch_post_metadata(self, post_url):
+        """Stream a post page only until its JSON-LD block has arrived, then close the
+        connection. Returns the BlogPosting title, dates and author, or None."""
+        response = self.transport.get(post_url, stream=True)
+        scanner = JsonLdScanner()
+        metadata = None
+        received = 0
+        try:
+            with self.metrics.timer('metadata'):
+                for chunk in self.transport.iter_chunks(response):
+                    received += len(chunk)
+                    for raw in scanner.feed(chunk):
+                        metadata = metadata or blog_posting_metadata(raw)
+                    if metadata:
+                        break
+        finally:
+            response.close()
+        self.metrics.incr('http.bytes', received)
+        self.metrics.incr('metadata.probes')
+        return metadata
+
     def fetch_post_content(self, post_url):
         """Fetch individual blog post content"""
         try:
-            response = self.session.get(post_url)
-            soup = BeautifulSoup(response.content, 'html.parser')
-            
-            # Extract post content
-            content = {}
-            
-            # Try to extract from JSON-LD first
-            script_tag = soup.find('script', type='application/ld+json')
-            if script_tag:
-                try:
-                    json_data = json.loads(script_tag.string)
-                    if json_data.get('@type') == 'BlogPosting':
-                        content['title'] = json_data.get('headline', '')
-                        content['date'] = json_data.get('datePublished', '')
-                        if 'author' in json_data and isinstance(json_data['author'], dict):
-                            content['author'] = json_data['author'].get('name', '')
-                except:
-                    pass
-            
-            # Fallback title extraction
-            if 'title' not in content or not content['title']:
-                title_tag = soup.find('h1') or soup.find('title')
-                content['title'] = title_tag.get_text(strip=True) if title_tag else "Untitled"
-            
-            # Fallback date extraction
-            if 'date' not in content or not content['date']:
-                date_tag = soup.find(class_=re.compile(r'date|Date|published|Published')) or soup.find('time')
-                content['date'] = date_tag.get_text(strip=True) if date_tag else ""
-            
-            # Fallback author extraction
-            if 'author' not in content or not content['author']:
-                author_tag = soup.find(class_=re.compile(r'author|Author')) or soup.find('meta', {'name': 'author'})
-                if author_tag:
-                    content['author'] = author_tag.get('content') if author_tag.name == 'meta' else author_tag.get_text(strip=True)
-                else:
-                    content['author'] = ""
-            
-            # Extract main content - try multiple selectors
-            article = None
-            
-            # Try to find main content area
-            for selector in ['article', '[class*="blogContent"]', '[class*="blog-content"]', 
-                           '[class*="post-content"]', '[class*="postContent"]', 'main']:
-                article = soup.select_one(selector)
-                if article:
-                    break
-            
-            # If still not found, look for container with h1 and subsequent content
-            if not article:
-                h1_tag = soup.find('h1')
-                if h1_tag and h1_tag.parent:
-                    article = h1_tag.parent.parent  # Go up to likely container
-            
-            if article:
-                # Extract all text content with lightweight structure hints
-                elements = article.find_all(['p', 'h2', 'h3', 'h4', 'li'])
-                lines = []
-                for el in elements:
-                    txt = el.get_text(strip=True)
-                    if not txt:
-                        continue
-                    if el.name == 'h2':
-                        lines.append(f"## {txt}")
-                    elif el.name == 'h3':
-                        lines.append(f"### {txt}")
-                    elif el.name == 'h4':
-                        lines.append(f"#### {txt}")
-                    elif el.name == 'li':
-                        lines.append(f"- {txt}")
-                    else:  # paragraph
-                        lines.append(txt)
-                content['text'] = '\n'.join(lines)
-            else:
-                # Last resort: get all paragraphs from body
-                paragraphs = soup.find_all('p')
-                content['text'] = '\n'.join([p.get_text(strip=True) for p in paragraphs if p.get_text(strip=True) and len(p.get_text(strip=True)) > 30])
-            
-            # Extract images/examples
-            images = soup.find_all('img')
-            content['has_images'] = len(images) > 0
-            
-            # Code blocks
-            code_blocks = soup.find_all(['code', 'pre'])
-            content['has_code'] = len(code_blocks) > 0
-            
-            return content
+            response = self.fetch_post_page(post_url)
+            return self.parse_post_content(response.content)
         except Exception as e:
             print(f"Error fetching {post_url}: {e}")
             return None
-    
-    def categorize_post(self, post_data):
-        """Categorize post based on title and content"""
-        text = (post_data.get('title', '') + ' ' + post_data.get('text', '')).lower()
-        
-        categories = []
-        
-        # Define category keywords
-        category_keywords = {
-            'Engineering & Infrastructure': ['infrastructure', 'performance', 'optimization', 'memory', 'server', 'architecture', 'scaling', 'compute', 'gke', 'cloud', 'kubernetes'],
-            'A/B Testing & Experimentation': ['experiment', 'a/b test', 'testing', 'hypothesis', 'control', 'variant', 'statistical', 'p-value', 'multiple comparison'],
-            'AI & Machine Learning': ['ai', 'machine learning', 'llm', 'gpt', 'openai', 'artificial intelligence', 'model', 'ai-generated'],
-            'Product Analytics': ['analytics', 'metrics', 'measurement', 'tracking', 'data', 'insights', 'count distinct'],
-            'Feature Management': ['feature flag', 'feature gate', 'rollout', 'deployment', 'release'],
-            'Company Updates': ['announcement', 'acquisition', 'partnership', 'funding', 'team'],
-            'Case Studies & Success Stories': ['case study', 'customer', 'how we', 'lessons learned', 'story behind'],
-            'Product Development': ['product', 'development', 'building', 'design', 'user experience'],
-            'Data Engineering': ['warehouse', 'data pipeline', 'etl', 'data platform', 'fabric', 'microsoft'],
-            'Best Practices & Guides': ['guide', 'best practice', 'how to', 'tutorial', 'tips']
-        }
+
+    def download_post(self, post_url):
+        """I/O stage: download a post without parsing it.
+
+        Returns a (page, content, analysis) tuple, or None on failure. `page` holds the
+        raw HTML and its cache validators; it is None when the cached copy is still
+        current, in which case the cached content and analysis are returned instead.
+        """
+        cached = self.cache.get(post_url, self.analysis_key) if self.cache else None
+        if cached and cached['metadata'] and self.metadata == 'first':
+            # Read just the JSON-LD block; unchanged metadata means the cached copy is current
+            try:
+                metadata = self.fetch_post_metadata(post_url)
+            except Exception as e:
+                print(f"Error fetching {post_url}: {e}")
+                return None
+            if metadata == cached['metadata']:
+                self.cache.record('metadata_unchanged')
+                return None, cached['content'], cached['analysis']
+        headers = {}
+        if cached and cached['etag']:
+            headers['If-None-Match'] = cached['etag']
+        if cached and cached['last_modified']:
+            headers['If-Modified-Since'] = cached['last_modified']
+        try:
+            response = self.fetch_post_page(post_url, headers=headers)
+        except Exception as e:
+            print(f"Error fetching {post_url}: {e}")
+            return None
+        if cached and response.status_code == 304:
+            self.cache.record('not_modified')
+            return None, cached['content'], cached['analysis']
+
+        html = response.content
+        page = {'html': html, 'content_hash': hashlib.sha256(html).hexdigest(),
+                'etag': response.headers.get('ETag'), 'last_modified': response.headers.get('Last-Modified')}
+        if cached and cached['content_hash'] == page['content_hash']:
+            self.cache.record('unchanged')
+            self.cache.update_validators(post_url, page['etag'], page['last_modified'], scan_metadata(html))
+            return None, cached['content'], cached['analysis']
+        return page, None, None
+
+    def store_page(self, post_url, page, content):
+        """Record a freshly downloaded and parsed page in the cache"""
+        self.cache.record('fetched')
+        self.cache.store_page(post_url, page['etag'], page['last_modified'], page['content_hash'],
+                              page['html'], content, scan_metadata(page['html']))
+
+    def fetch_cached_post(self, post_url):
+        """Fetch a post through the on-disk cache.
+
+        Returns a (content, analysis) tuple. `analysis` holds the cached categories and
+        summary when the page is unchanged, otherwise None and the caller recomputes it.
+        """
+        downloaded = self.download_post(post_url)
+        if downloaded is None:
+            return None, None
+        page, content, analysis = downloaded
+        if page is None:
+            return content, analysis
+        try:
+            content = self.parse_post_content(page['html'])
+        except Exception as e:
+            print(f"Error fetching {post_url}: {e}")
+            return None, None
+        self.store_page(post_url, page, content)
+        return content, None
+
+    def parse_post_content(self, html):
+        """Extract title, date, author, text and flags from a post page"""
+        with self.metrics.timer('parse'):
+            return self.extract_post_content(BeautifulSoup(html, self.parser))
+
+    def extract_post_content(self, soup):
+        """Single-pass extractor: one walk over the tree collects every element the
+        field lookups need, in document order"""
+        order = []          # tags in document (pre-)order
+        subtree_end = []    # subtree_end[i]: index just past the descendants of order[i]
+        text_positions = []  # indices of p/h2/h3/h4/li tags
+        first = {}
+        date_tag = author_tag = None
+        profile = self.profile
+        selector_tags, selector_fragments = profile.selector_tags, profile.selector_fragments
+        selector_hits = [None] * len(profile.content_selectors)
+        has_images = has_code = False
+
+        open_tags = []
+        stack = [iter(soup.contents)]
+        while stack:
+            for node in stack[-1]:
+                if not isinstance(node, Tag):
+                    continue
+                index = len(order)
+                order.append(node)
+                subtree_end.append(index + 1)
+                name = node.name
+                if name in TEXT_TAGS:
+                    text_positions.append(index)
+                if name in FIRST_TAGS and name not in first:
+                    if name == 'script':
+                        if node.get('type') == 'application/ld+json':
+                            first[name] = node
+                    elif name == 'meta':
+                        if node.get('name') == 'author':
+                            first[name] = node
+                    else:
+                        first[name] = node
+                if name == 'img':
+                    has_images = True
+                elif name == 'code' or name == 'pre':
+                    has_code = True
+
+                classes = node.get('class')
+                if classes is not None:
+                    if date_tag is None and _class_matches(classes, profile.date_class_re):
+                        date_tag = node
+                    if author_tag is None and _class_matches(classes, profile.author_class_re):
+                        author_tag = node
+                    if isinstance(classes, list):
+                        classes = ' '.join(classes)
+                    for i, fragment in selector_fragments:
+                        if selector_hits[i] is None and fragment in classes:
+                            selector_hits[i] = node
+                i = selector_tags.get(name)
+                if i is not None and selector_hits[i] is None:
+                    selector_hits[i] = node
+
+                if node.contents:
+                    open_tags.append(index)
+                    stack.append(iter(node.contents))
+                    break
+            else:
+                stack.pop()
+                if open_tags:
+                    index = open_tags.pop()
+                    subtree_end[index] = len(order)
+
+        content = {}
+
+        # Try to extract from JSON-LD first
+        script_tag = first.get('script')
+        if script_tag:
+            try:
+                json_data = json.loads(script_tag.string)
+                if json_data.get('@type') == 'BlogPosting':
+                    content['title'] = json_data.get('headline', '')
+                    content['date'] = json_data.get('datePublished', '')
+                    if 'author' in json_data and isinstance(json_data['author'], dict):
+                        content['author'] = json_data['author'].get('name', '')
+            except:
+                pass
+
+        # Fallback title extraction
+        if 'title' not in content or not content['title']:
+            title_tag = first.get('h1') or first.get('title')
+            content['title'] = title_tag.get_text(strip=True) if title_tag else "Untitled"
+
+        # Fallback date extraction
+        if 'date' not in content or not content['date']:
+            date_tag = date_tag or first.get('time')
+            content['date'] = date_tag.get_text(strip=True) if date_tag else ""
+
+        # Fallback author extraction
+        if 'author' not in content or not content['author']:
+            author_tag = author_tag or first.get('meta')
+            if author_tag:
+                content['author'] = author_tag.get('content') if author_tag.name == 'meta' else author_tag.get_text(strip=True)
+            else:
+                content['author'] = ""
+
+        # Main content area: first selector (in priority order) that matched anything
+        article = next((hit for hit in selector_hits if hit is not None), None)
+
+        # If still not found, look for container with h1 and subsequent content
+        if not article:
+            h1_tag = first.get('h1')
+            if h1_tag and h1_tag.parent:
+                article = h1_tag.parent.parent  # Go up to likely container
+
+        if article:
+            if article is soup:
+                lo, hi = -1, len(order)
+            else:
+                lo = next(i for i, tag in enumerate(order) if tag is article)
+                hi = subtree_end[lo]
+            # Extract all text content with lightweight structure hints
+            lines = []
+            for position in text_positions[bisect.bisect_right(text_positions, lo):]:
+                if position >= hi:
+                    break
+                el = order[position]
+                txt = el.get_text(strip=True)
+                if not txt:
+                    continue
+                if el.name == 'h2':
+                    lines.append(f"## {txt}")
+                elif el.name == 'h3':
+                    lines.append(f"### {txt}")
+                elif el.name == 'h4':
+                    lines.append(f"#### {txt}")
+                elif el.name == 'li':
+                    lines.append(f"- {txt}")
+                else:  # paragraph
+                    lines.append(txt)
+            content['text'] = '\n'.join(lines)
+        else:
+            # Last resort: get all paragraphs from body
+            paragraphs = [order[i].get_text(strip=True) for i in text_positions if order[i].name == 'p']
+            content['text'] = '\n'.join([p for p in paragraphs if p and len(p) > 30])
+
+        content['has_images'] = has_images
+        content['has_code'] = has_code
+        return content
+
+    def extract_post_content_multipass(self, soup):
+        """Reference extractor that searches the tree once per field.
+
+        Kept to verify that extract_post_content produces identical output
+        (see check_parser_parity.py).
+        """
+        content = {}
         
-        for category, keywords in category_keywords.items():
-            if any(keyword in text for keyword in keywords):
-                categories.append(category)
+        # Try to extract from JSON-LD first
+        script_tag = soup.find('script', type='application/ld+json')
+        if script_tag:
+            try:
+                json_data = json.loads(script_tag.string)
+                if json_data.get('@type') == 'BlogPosting':
+                    content['title'] = json_data.get('headline', '')
+                    content['date'] = json_data.get('datePublished', '')
+                    if 'author' in json_data and isinstance(json_data['author'], dict):
+                        content['author'] = json_data['author'].get('name', '')
+            except:
+                pass
+        
+        # Fallback title extraction
+        if 'title' not in content or not content['title']:
+            title_tag = soup.find('h1') or soup.find('title')
+            content['title'] = title_tag.get_text(strip=True) if title_tag else "Untitled"
+        
+        # Fallback date extraction
+        if 'date' not in content or not content['date']:
+            date_tag = soup.find(class_=self.profile.date_class_re) or soup.find('time')
+            content['date'] = date_tag.get_text(strip=True) if date_tag else ""
+        
+        # Fallback author extraction
+        if 'author' not in content or not content['author']:
+            author_tag = soup.find(class_=self.profile.author_class_re) or soup.find('meta', {'name': 'author'})
+            if author_tag:
+                content['author'] = author_tag.get('content') if author_tag.name == 'meta' else author_tag.get_text(strip=True)
+            else:
+                content['author'] = ""
+        
+        # Extract main content - try multiple selectors
+        article = None
+        
+        # Try to find main content area
+        for selector in self.profile.content_selectors:
+            article = soup.select_one(selector)
+            if article:
+                break
+        
+        # If still not found, look for container with h1 and subsequent content
+        if not article:
+            h1_tag = soup.find('h1')
+            if h1_tag and h1_tag.parent:
+                article = h1_tag.parent.parent  # Go up to likely container
+        
+        if article:
+            # Extract all text content with lightweight structure hints
+            elements = article.find_all(['p', 'h2', 'h3', 'h4', 'li'])
+            lines = []
+            for el in elements:
+                txt = el.get_text(strip=True)
+                if not txt:
+                    continue
+                if el.name == 'h2':
+                    lines.append(f"## {txt}")
+                elif el.name == 'h3':
+                    lines.append(f"### {txt}")
+                elif el.name == 'h4':
+                    lines.append(f"#### {txt}")
+                elif el.name == 'li':
+                    lines.append(f"- {txt}")
+                else:  # paragraph
+                    lines.append(txt)
+            content['text'] = '\n'.join(lines)
+        else:
+            # Last resort: get all paragraphs from body
+            paragraphs = soup.find_all('p')
+            content['text'] = '\n'.join([p.get_text(strip=True) for p in paragraphs if p.get_text(strip=True) and len(p.get_text(strip=True)) > 30])
+        
+        # Extract images/examples
+        images = soup.find_all('img')
+        content['has_images'] = len(images) > 0
         
+        # Code blocks
+        code_blocks = soup.find_all(['code', 'pre'])
+        content['has_code'] = len(code_blocks) > 0
+        
+        return content
+    
+    def category_text(self, post_data):
+        """The lowercased title and content that categories are matched against"""
+        return (post_data.get('title', '') + ' ' + post_data.get('text', '')).lower()
+
+    def score_categories(self, post_data):
+        """Count keyword hits per category in the post title and content"""
+        return self.keyword_matcher.count(self.category_text(post_data))
+
+    def categorize_post(self, post_data, scores=None):
+        """Categorize post based on title and content"""
+        if scores is None:
+            scores = self.score_categories(post_data)
+        categories = [category for category, hits in scores.items() if hits >= self.min_category_hits]
         return categories if categories else ['General']
     
-    def extract_data_points(self, text):
+    def extract_data_points(self, text, analysis=None):
         """Extract quantitative metrics and data points from text"""
+        analysis = analysis or TextAnalysis(text)
         data_points = []
         
-        # Patterns for metrics
-        patterns = [
-            r'\b(\d+)%\s+(increase|decrease|improvement|reduction|faster|slower|more|less)',
-            r'\b(\d+[,.]?\d*)\s*(million|billion|thousand|k|m|b)\s+(users|events|requests|experiments)',
-            r'\breduced?\s+by\s+(\d+)%',
-            r'\bimproved?\s+by\s+(\d+)%',
-            r'\b(\d+[,.]?\d*)\s*(ms|seconds?|minutes?|hours?)\s+(faster|slower|latency|response time)',
-            r'\bfrom\s+(\d+)\s+to\s+(\d+)',
-        ]
-        
-        sentences = re.split(r'(?<=[.!?])\s+', text)
-        for sentence in sentences:
-            for pattern in patterns:
-                if re.search(pattern, sentence, re.IGNORECASE):
-                    if len(sentence) < 200 and sentence not in data_points:
-                        data_points.append(sentence.strip())
-                        break
+        for sentence in analysis.raw_sentences:
+            if DATA_POINT_RE.search(sentence):
+                if len(sentence) < 200 and sentence not in data_points:
+                    data_points.append(sentence.strip())
             if len(data_points) >= 5:
                 break
         
         return data_points
     
-    def extract_examples(self, text):
+    def extract_examples(self, text, analysis=None):
         """Extract concrete examples and use cases"""
+        analysis = analysis or TextAnalysis(text)
         examples = []
-        lines = text.split('\n')
-        
-        # Look for example indicators
-        example_patterns = [
-            r'for example[,:]?',
-            r'for instance[,:]?',
-            r'such as[,:]?',
-            r'e\.g\.',
-            r'example:',
-            r'use case:',
-            r'case study:',
-        ]
+        lines = analysis.raw_lines
         
         for i, line in enumerate(lines):
             line = line.strip()
@@ -212,37 +2944,35 @@ class StatsigBlogScraper:
                 continue
             
             # Check if line contains example indicator
-            for pattern in example_patterns:
-                if re.search(pattern, line, re.IGNORECASE):
-                    # Get context: current line + next 1-2 lines if they're related
-                    context = [line]
-                    for j in range(i+1, min(i+3, len(lines))):
-                        next_line = lines[j].strip()
-                        if next_line and not next_line.startswith('##'):
-                            context.append(next_line)
-                        else:
-                            break
-                    
-                    example_text = ' '.join(context)
-                    if 50 <= len(example_text) <= 300:
-                        examples.append(example_text)
+            if EXAMPLE_RE.search(line):
+                # Get context: current line + next 1-2 lines if they're related
+                context = [line]
+                for j in range(i+1, min(i+3, len(lines))):
+                    next_line = lines[j].strip()
+                    if next_line and not next_line.startswith('##'):
+                        context.append(next_line)
+                    else:
                         break
+                
+                example_text = ' '.join(context)
+                if 50 <= len(example_text) <= 300:
+                    examples.append(example_text)
             
             if len(examples) >= 3:
                 break
         
         return examples
     
-    def extract_key_takeaways(self, text, title):
+    def extract_key_takeaways(self, text, title, analysis=None):
         """Extract actionable takeaways and insights"""
+        analysis = analysis or TextAnalysis(text)
         takeaways = []
-        lines = [ln.strip() for ln in text.split('\n') if ln.strip()]
         
         # Look for conclusion/takeaway sections
         conclusion_keywords = ['conclusion', 'takeaway', 'summary', 'key insight', 'lesson learned', 'in summary']
         in_conclusion_section = False
         
-        for i, line in enumerate(lines):
+        for line in analysis.lines:
             # Detect conclusion sections
             if any(keyword in line.lower() for keyword in conclusion_keywords):
                 in_conclusion_section = True
@@ -253,8 +2983,9 @@ class StatsigBlogScraper:
                 if line.startswith('## ') or line.startswith('### '):
                     in_conclusion_section = False
                     continue
-                if re.match(r'^(?:[\-\*•]|\d+\.)\s+', line):
-                    point = re.sub(r'^(?:[\-\*•]|\d+\.)\s+', '', line)
+                bullet = BULLET_RE.match(line)
+                if bullet:
+                    point = line[bullet.end():]
                     if 30 <= len(point) <= 200:
                         takeaways.append(point)
             
@@ -263,19 +2994,8 @@ class StatsigBlogScraper:
         
         # If no explicit takeaways found, extract actionable sentences
         if len(takeaways) < 3:
-            action_patterns = [
-                r'\bshould\b',
-                r'\bmust\b',
-                r'\brecommend\b',
-                r'\bbest practice\b',
-                r'\bimportant to\b',
-                r'\bkey is to\b',
-                r'\bmake sure\b',
-            ]
-            
-            sentences = re.split(r'(?<=[.!?])\s+', text)
-            for sentence in sentences:
-                if any(re.search(pattern, sentence, re.IGNORECASE) for pattern in action_patterns):
+            for sentence in analysis.raw_sentences:
+                if ACTION_RE.search(sentence):
                     if 40 <= len(sentence) <= 200 and sentence not in takeaways:
                         takeaways.append(sentence.strip())
                         if len(takeaways) >= 5:
@@ -289,15 +3009,16 @@ class StatsigBlogScraper:
         title = post_data.get('title', '') or ''
 
         # Normalize whitespace
-        text = re.sub(r'\u00A0', ' ', text)
-        text = re.sub(r'\s+\n', '\n', text)
+        text = normalize_text(text)
 
-        # Split into sentences (keep punctuation)
-        sentences = re.split(r'(?<=[.!?])\s+', text)
-        sentences = [s.strip() for s in sentences if len(s.strip()) > 0]
+        # Split into sentences and lines once; every extractor below reuses them
+        analysis = TextAnalysis(text)
+        sentences = [s.strip() for s in analysis.raw_sentences if len(s.strip()) > 0]
+        self.metrics.incr('summarize.sentences', len(analysis.raw_sentences))
+        self.metrics.incr('summarize.lines', len(analysis.raw_lines))
 
         # Identify section headers from structured hints we inject (##, ###)
-        lines = [ln.strip() for ln in text.split('\n') if ln.strip()]
+        lines = analysis.lines
         headers = [ln for ln in lines if ln.startswith('## ') or ln.startswith('### ') or ln.startswith('#### ')]
 
         # Build comprehensive summary
@@ -317,8 +3038,9 @@ class StatsigBlogScraper:
         # Key points: prefer explicit bullets, then headers
         key_points = []
         for ln in lines:
-            if re.match(r'^(?:[\-\*•]|\d+\.)\s+', ln):
-                point = re.sub(r'^(?:[\-\*•]|\d+\.)\s+', '', ln)
+            bullet = BULLET_RE.match(ln)
+            if bullet:
+                point = ln[bullet.end():]
                 if 25 <= len(point) <= 180:
                     key_points.append(point)
             if len(key_points) >= 8:
@@ -326,7 +3048,7 @@ class StatsigBlogScraper:
         
         if len(key_points) < 8:
             for h in headers:
-                point = re.sub(r'^#+\s*', '', h)
+                point = HEADER_PREFIX_RE.sub('', h)
                 if 15 <= len(point) <= 120 and point not in key_points:
                     key_points.append(point)
                 if len(key_points) >= 8:
@@ -343,9 +3065,10 @@ class StatsigBlogScraper:
         key_points = deduped[:8]
         
         # Extract additional rich content
-        data_points = self.extract_data_points(text)
-        examples = self.extract_examples(text)
-        takeaways = self.extract_key_takeaways(text, title)
+        data_points = self.extract_data_points(text, analysis)
+        examples = self.extract_examples(text, analysis)
+        takeaways = self.extract_key_takeaways(text, title, analysis)
+        self.metrics.incr('summarize.matches', len(data_points) + len(examples) + len(takeaways))
 
         return {
             'summary': summary,
@@ -355,78 +3078,124 @@ class StatsigBlogScraper:
             'takeaways': takeaways
         }
     
+    def summarize_corpus(self, posts):
+        """Replace the summary and key points of `posts` with corpus-level extractive
+        ones (--summarizer tfidf/textrank). Data points, examples and takeaways keep
+        the heuristic extractors. Returns `posts`."""
+        if not self.corpus_summarizer:
+            return posts
+        with self.metrics.timer('summarize.corpus'):
+            results = self.corpus_summarizer.summarize([post.get('text', '') or '' for post in posts])
+        for post, result in zip(posts, results):
+            if result:
+                summary, key_points = result
+                if summary:
+                    post['summary'] = summary
+                if key_points:
+                    post['key_points'] = key_points
+        return posts
+    
     def get_category_prompts(self):
         """Return customized prompt suggestions for each category"""
-        return {
-            'A/B Testing & Experimentation': [
-                "What are the best practices for designing experiments with multiple variants?",
-                "How should I handle statistical significance and p-values in A/B tests?",
-                "What are common pitfalls in experimentation and how can I avoid them?",
-                "How do I design experiments to avoid multiple comparison problems?",
-            ],
-            'AI & Machine Learning': [
-                "What are best practices for implementing AI features with experimentation?",
-                "How can I measure and validate AI model performance in production?",
-                "What are considerations for A/B testing AI-generated content?",
-            ],
-            'Product Analytics': [
-                "What metrics should I track for [feature/product]?",
-                "How do I set up analytics to measure user engagement?",
-                "What are best practices for event tracking and data collection?",
-            ],
-            'Feature Management': [
-                "How should I implement feature flags for gradual rollouts?",
-                "What are best practices for feature flag lifecycle management?",
-                "How do I use feature gates to minimize deployment risk?",
-            ],
-            'Engineering & Infrastructure': [
-                "What are the performance optimization techniques used at scale?",
-                "How can I improve infrastructure efficiency and reduce costs?",
-                "What architecture patterns work best for high-traffic services?",
-            ],
-            'Case Studies & Success Stories': [
-                "What lessons from [company] case study apply to my situation?",
-                "How have other teams solved [specific challenge]?",
-                "What outcomes can I expect from implementing [approach]?",
-            ],
-            'Best Practices & Guides': [
-                "What is the recommended approach for [specific task]?",
-                "What are the key considerations when implementing [feature]?",
-                "How do I get started with [topic]?",
-            ],
-        }
+        return self.profile.category_prompts
     
     def generate_markdown(self, categorized_posts):
         """Generate comprehensive markdown output optimized for AI assistants"""
-        md = ["# Statsig Blog Knowledge Base\n"]
-        md.append("## Comprehensive Guide for AI-Assisted Development\n")
-        md.append(f"*Generated: {datetime.now().strftime('%Y-%m-%d %H:%M:%S')}*\n")
-        md.append(f"*Total Articles: {sum(len(posts) for posts in categorized_posts.values())}*\n")
-        md.append(f"*Categories: {len(categorized_posts)}*\n")
-        md.append("\n---\n")
+        return '\n'.join(self.iter_markdown(categorized_posts))
+
+    def write_markdown(self, categorized_posts, output_file):
+        """Write the markdown to `output_file` piece by piece instead of building one string"""
+        with AtomicFile(output_file) as f:
+            for i, piece in enumerate(self.iter_markdown(categorized_posts)):
+                if i:
+                    f.write('\n')
+                f.write(piece)
+
+    def iter_post_markdown(self, post):
+        """Yield the markdown for one post below its heading: metadata, source link,
+        summary, key points, data points, examples and takeaways"""
+        # Metadata line
+        metadata = []
+        if post.date:
+            metadata.append(f"📅 {post.date}")
+        if post.author:
+            metadata.append(f"✍️ {post.author}")
+        if metadata:
+            yield ' | '.join(metadata) + '\n'
         
-        # Overview section
-        md.append("\n## 📋 Overview\n")
-        md.append("""
-This knowledge base contains deep insights from Statsig's engineering blog, organized for maximum utility in AI-assisted development workflows. Each article includes:
+        yield f"\n🔗 **Source:** {post.url}\n"
+        if self.dedup:
+            if post.duplicate_of:
+                canonical, similarity = self.dedup.canonical[post.url]
+                yield (f"\n🔁 **Near-duplicate of:** [{self.dedup.titles[canonical]}]({canonical}) "
+                       f"(~{similarity:.0%} similar)\n")
+            similar = self.dedup.duplicates.get(post.url)
+            if similar:
+                links = ', '.join(f"[{title}]({url})" for url, title, _ in similar)
+                yield f"\n🔁 **Near-duplicates{' (not shown)' if self.dedup_mode == 'collapse' else ''}:** {links}\n"
+        
+        # Summary
+        yield f"\n**📖 Summary**\n\n{post.summary}\n"
+        
+        # Key Points
+        if post.key_points:
+            yield "\n**🎯 Key Points**\n"
+            for point in post.key_points:
+                yield f"- {point}\n"
+        
+        # Data Points & Metrics
+        if post.data_points:
+            yield "\n**📊 Data Points & Metrics**\n"
+            for dp in post.data_points:
+                yield f"- {dp}\n"
+        
+        # Examples
+        if post.examples:
+            yield "\n**💼 Examples & Use Cases**\n"
+            for example in post.examples:
+                yield f"- {example}\n"
+        
+        # Takeaways
+        if post.takeaways:
+            yield "\n**✅ Key Takeaways**\n"
+            for takeaway in post.takeaways:
+                yield f"- {takeaway}\n"
+        
+        # Related posts
+        related = self.related.related(post.url) if self.related else None
+        if related:
+            yield "\n**🧭 See Also**\n"
+            for url, title, _ in related:
+                yield f"- [{title}]({url})\n"
 
-- **Comprehensive summaries** with context and background
-- **Concrete examples** and real-world use cases  
-- **Quantitative data points** and performance metrics
-- **Actionable takeaways** you can apply immediately
-- **Direct source links** for deeper exploration
+    def iter_markdown(self, categorized_posts):
+        """Yield the markdown document section by section; joined with newlines it is
+        the output of generate_markdown"""
+        return MarkdownRenderer(self, categorized_posts, self.render_workers, reuse_bodies=not self.stream).iter_pieces()
 
-Use this resource to inform technical decisions, learn best practices, and understand proven patterns in experimentation, feature management, and product analytics.
-""")
+    def iter_markdown_reference(self, categorized_posts):
+        """Reference renderer: walks the categories three times and renders a post
+        again in every category it appears in. MarkdownRenderer must produce the same
+        document; `benchmark_scraper.py render` compares the two."""
+        yield f"# {self.profile.title} Knowledge Base\n"
+        yield "## Comprehensive Guide for AI-Assisted Development\n"
+        yield f"*Generated: {datetime.now().strftime('%Y-%m-%d %H:%M:%S')}*\n"
+        yield f"*Total Articles: {sum(len(posts) for posts in categorized_posts.values())}*\n"
+        yield f"*Categories: {len(categorized_posts)}*\n"
+        yield "\n---\n"
+        
+        # Overview section
+        yield "\n## 📋 Overview\n"
+        yield KNOWLEDGE_BASE_OVERVIEW.format(title=self.profile.title)
         
         # Table of contents with stats
-        md.append("\n## 📚 Table of Contents\n")
+        yield "\n## 📚 Table of Contents\n"
         for category in sorted(categorized_posts.keys()):
             count = len(categorized_posts[category])
             anchor = category.lower().replace(' ', '-').replace('&', '').replace('--', '-')
-            md.append(f"- [{category}](#{anchor}) — {count} article{'s' if count != 1 else ''}\n")
+            yield f"- [{category}](#{anchor}) — {count} article{'s' if count != 1 else ''}\n"
         
-        md.append("\n---\n")
+        yield "\n---\n"
         
         # Category-specific prompts
         category_prompts = self.get_category_prompts()
@@ -436,178 +3205,961 @@ Use this resource to inform technical decisions, learn best practices, and under
             posts = categorized_posts[category]
             anchor = category.lower().replace(' ', '-').replace('&', '').replace('--', '-')
             
-            md.append(f"\n## {category}\n")
-            md.append(f"*{len(posts)} article{'s' if len(posts) != 1 else ''}*\n")
+            yield f"\n## {category}\n"
+            yield f"*{len(posts)} article{'s' if len(posts) != 1 else ''}*\n"
             
             # Add category-specific prompts
             if category in category_prompts:
-                md.append("\n### 💡 Suggested Questions for This Category\n")
+                yield "\n### 💡 Suggested Questions for This Category\n"
                 for prompt in category_prompts[category]:
-                    md.append(f"- {prompt}\n")
-                md.append("\n")
+                    yield f"- {prompt}\n"
+                yield "\n"
             
             for i, post in enumerate(posts, 1):
-                md.append(f"\n### {i}. {post['title']}\n")
-                
-                # Metadata line
-                metadata = []
-                if post.get('date'):
-                    metadata.append(f"📅 {post['date']}")
-                if post.get('author'):
-                    metadata.append(f"✍️ {post['author']}")
-                if metadata:
-                    md.append(' | '.join(metadata) + '\n')
+                yield f"\n### {i}. {post.title}\n"
                 
-                md.append(f"\n🔗 **Source:** {post['url']}\n")
-                
-                # Summary
-                md.append(f"\n**📖 Summary**\n\n{post['summary']}\n")
-                
-                # Key Points
-                if post.get('key_points'):
-                    md.append("\n**🎯 Key Points**\n")
-                    for point in post['key_points']:
-                        md.append(f"- {point}\n")
-                
-                # Data Points & Metrics
-                if post.get('data_points'):
-                    md.append("\n**📊 Data Points & Metrics**\n")
-                    for dp in post['data_points']:
-                        md.append(f"- {dp}\n")
-                
-                # Examples
-                if post.get('examples'):
-                    md.append("\n**💼 Examples & Use Cases**\n")
-                    for example in post['examples']:
-                        md.append(f"- {example}\n")
-                
-                # Takeaways
-                if post.get('takeaways'):
-                    md.append("\n**✅ Key Takeaways**\n")
-                    for takeaway in post['takeaways']:
-                        md.append(f"- {takeaway}\n")
-                
-                md.append("\n---\n")
+                yield from self.iter_post_markdown(post)
+                yield "\n---\n"
         
         # Enhanced instructions for AI assistants
-        md.append("\n## 🤖 AI Assistant Usage Guide\n")
-        md.append("""
-### How to Leverage This Knowledge Base
+        yield "\n## 🤖 AI Assistant Usage Guide\n"
+        yield AI_USAGE_GUIDE.format(title=self.profile.title)
+        
+        for category in sorted(categorized_posts.keys()):
+            post_count = len(categorized_posts[category])
+            yield f"**{category}** ({post_count} article{'s' if post_count != 1 else ''})\n"
+            
+            if category in category_prompts:
+                yield "Example prompts:\n"
+                for prompt in category_prompts[category][:2]:  # Show first 2
+                    yield f"  - {prompt}\n"
+            yield "\n"
+        
+        # Quick reference
+        yield "\n### 📌 Quick Reference\n"
+        yield f"- **Total Knowledge Base Size**: ~{sum(len(posts) for posts in categorized_posts.values())} articles\n"
+        yield f"- **Coverage Areas**: {', '.join(sorted(categorized_posts.keys()))}\n"
+        yield f"- **Last Updated**: {datetime.now().strftime('%Y-%m-%d')}\n"
+        yield "\n---\n"
+        yield "\n*End of Knowledge Base*\n"
+    
+    def primary_category(self, post):
+        """The category a post is rendered under in sharded output: the one with the most keyword hits"""
+        return max(post.categories, key=lambda category: post.category_scores.get(category, 0))
 
-**For Users (Prompting Strategies):**
+    def write_shards(self, categorized_posts, output_dir, budget=100000, unit='tokens'):
+        """Write the knowledge base as markdown shards of at most `budget` tokens or bytes.
 
-1. **Be Specific with Context**
-   - ❌ "Tell me about A/B testing"
-   - ✅ "Based on Statsig's A/B testing articles, what are best practices for handling multiple variants with traffic imbalance?"
+        Each post is rendered once, under its primary category; its other categories
+        link to it instead of repeating it. index.md and manifest.json record which
+        shard holds each category and post, so a consumer only loads the shards it
+        needs. Returns the manifest.
+        """
+        os.makedirs(output_dir, exist_ok=True)
+        writer = ShardWriter(output_dir, budget, unit, self.profile.title)
+        category_prompts = self.get_category_prompts()
+        anchors = {}
+        used_anchors = set()
+        posts_manifest = {}
+        category_shards = {}
 
-2. **Reference Examples and Data**
-   - ❌ "How do I optimize performance?"
-   - ✅ "What performance optimization techniques does Statsig use? Include specific metrics from the engineering articles."
+        def anchor_for(post):
+            if post.url not in anchors:
+                slug = post.slug or urlparse(post.url).path
+                anchor = re.sub(r'[^a-z0-9]+', '-', slug.rstrip('/').rsplit('/', 1)[-1].lower()).strip('-') or 'post'
+                unique, n = anchor, 2
+                while unique in used_anchors:
+                    unique, n = f"{anchor}-{n}", n + 1
+                anchors[post.url] = unique
+                used_anchors.add(unique)
+            return anchors[post.url]
 
-3. **Ask for Comparisons**
-   - "Compare feature flag strategies vs. experimentation approaches mentioned in the articles"
-   - "What are the tradeoffs between approaches mentioned in [Article X] vs [Article Y]?"
+        try:
+            for category in sorted(categorized_posts.keys()):
+                posts = categorized_posts[category]
+                continuation = f"\n## {category} (continued)\n"
+                header = [f"\n## {category}\n", f"*{len(posts)} article{'s' if len(posts) != 1 else ''}*\n"]
+                if category in category_prompts:
+                    header.append("\n### 💡 Suggested Questions for This Category\n")
+                    header.extend(f"- {prompt}\n" for prompt in category_prompts[category])
+                first = writer.add('\n'.join(header), category)
+                shards = [first['file']]
 
-4. **Request Actionable Guidance**
-   - "Based on the case studies, give me a step-by-step plan to implement [feature]"
-   - "What are the top 5 takeaways from the product analytics category that apply to [my scenario]?"
+                related = []
+                for post in posts:
+                    anchor = anchor_for(post)
+                    home = self.primary_category(post)
+                    if home != category:
+                        related.append((post.title, anchor, home))
+                        continue
+                    block = '\n'.join([f'\n<a id="{anchor}"></a>\n', f"### {post.title}\n",
+                                       *self.iter_post_markdown(post), "\n---\n"])
+                    shard = writer.add(block, category, continuation)
+                    shard['posts'].append(post.url)
+                    posts_manifest[post.url] = {'title': post.title, 'date': post.date,
+                                                   'category': category, 'categories': list(post.categories),
+                                                   'shard': shard['file'], 'anchor': anchor}
 
-**For AI Assistants (How to Use This Context):**
+                # Links to posts rendered under another category; the target shard is filled in below
+                if related:
+                    writer.add(f"\n### 🔗 Also Relevant to {category}\n", category, continuation)
+                    for title, anchor, home in related:
+                        title = title.replace('[', '\\[').replace(']', '\\]')
+                        line = f"- [{title}](#xref-{anchor}) — *{home}*"
+                        sized_as = f"- [{title}](part-0000.md#{anchor}) — *{home}*"
+                        writer.add(line, category, continuation, size_text=sized_as)
+                shards.extend(entry['file'] for entry in writer.shards[writer.shards.index(first) + 1:])
+                category_shards[category] = {'articles': len(posts), 'related': len(related), 'shards': shards}
+        except BaseException:
+            writer.discard()
+            raise
+        writer.close()
 
-1. **Cite Sources**
-   - Always reference specific articles when drawing insights
-   - Include URLs so users can read full details
-   - Quote data points and metrics accurately
+        # Resolve cross-links now that every post has a shard
+        locations = {info['anchor']: f"{info['shard']}#{info['anchor']}" for info in posts_manifest.values()}
+        for shard in writer.shards:
+            path = os.path.join(output_dir, shard['file'])
+            with open(path, encoding='utf-8') as f:
+                text = f.read()
+            linked = XREF_RE.sub(lambda m: f"]({locations[m.group(1)]})", text)
+            if linked != text:
+                with AtomicFile(path) as f:
+                    f.write(linked)
+            shard['size'] = shard_size(linked, unit)
+            if shard['size'] > budget:
+                print(f"⚠ {shard['file']} is {shard['size']} {unit}, over the {budget} budget (a single post is larger)")
 
-2. **Synthesize Across Articles**
-   - Combine insights from multiple articles in the same category
-   - Identify patterns and common themes
-   - Note when articles present different perspectives
+        manifest = {'generated': datetime.now().isoformat(timespec='seconds'), 'budget': budget, 'unit': unit,
+                    'articles': len(posts_manifest), 'shards': writer.shards,
+                    'categories': category_shards, 'posts': posts_manifest}
+        with AtomicFile(os.path.join(output_dir, 'manifest.json')) as f:
+            json.dump(manifest, f, indent=2, ensure_ascii=False)
+        with AtomicFile(os.path.join(output_dir, 'index.md')) as f:
+            f.write(f"# {self.profile.title} Knowledge Base — Index\n\n")
+            f.write(f"*Generated: {datetime.now().strftime('%Y-%m-%d %H:%M:%S')}*\n\n")
+            f.write(f"*{len(posts_manifest)} articles in {len(writer.shards)} shards of at most "
+                    f"~{budget} {unit}. Each article appears once, under its primary category; "
+                    f"other categories link to it.*\n\n")
+            f.write("## Categories\n\n")
+            for category, info in category_shards.items():
+                files = ', '.join(f"[{name}]({name})" for name in info['shards'])
+                f.write(f"- **{category}** — {info['articles']} article{'s' if info['articles'] != 1 else ''} "
+                        f"({info['related']} linked from other categories): {files}\n")
+            f.write("\n## Shards\n\n")
+            for shard in writer.shards:
+                f.write(f"- [{shard['file']}]({shard['file']}) — {shard['size']} {unit}, "
+                        f"{len(shard['posts'])} articles: {', '.join(shard['categories'])}\n")
+        return manifest
 
-3. **Prioritize Concrete Information**
-   - Lead with examples and data points
-   - Highlight actionable takeaways
-   - Explain technical concepts using examples from the articles
+    def iter_post_metadata(self, posts):
+        """Yield posts merged with their JSON-LD metadata, in `posts` order, without
+        downloading or parsing full pages"""
+        def probe(post):
+            try:
+                return self.fetch_post_metadata(post['url'])
+            except Exception as e:
+                print(f"Error fetching {post['url']}: {e}")
+                return None
 
-4. **Acknowledge Limitations**
-   - Note when information is dated (check article dates)
-   - Indicate when a topic isn't covered in the knowledge base
-   - Suggest areas where the user should consult current documentation
+        with ThreadPoolExecutor(max_workers=self.workers) as executor:
+            for post, metadata in zip(posts, executor.map(probe, posts)):
+                yield dict(post, **metadata) if metadata else dict(post, date='', author='')
 
-### Category-Specific Use Cases
+    def write_metadata_listing(self, posts, output_file, writers=()):
+        """Metadata-only run: list every post's title, date and author, newest first.
 
-""")
+        With a cache, posts that are not cached yet are marked new and posts whose
+        metadata differs from the cached copy are marked updated. Returns the number
+        of posts listed.
+        """
+        listed = []
+        counts = Counter()
+        try:
+            for post in self.iter_post_metadata(posts):
+                if self.cache:
+                    cached = self.cache.get(post['url'], self.analysis_key)
+                    if not cached:
+                        post['status'] = 'new'
+                    elif cached['metadata'] and cached['metadata'] != {key: post.get(key, '') for key in cached['metadata']}:
+                        post['status'] = 'updated'
+                    counts[post.get('status')] += 1
+                record = export_record(post)
+                for writer in writers:
+                    writer.write(record)
+                listed.append(post)
+        except BaseException:
+            for writer in writers:
+                writer.discard()
+            raise
+        for writer in writers:
+            writer.close()
         
-        for category in sorted(categorized_posts.keys()):
-            post_count = len(categorized_posts[category])
-            md.append(f"**{category}** ({post_count} article{'s' if post_count != 1 else ''})\n")
-            
-            if category in category_prompts:
-                md.append("Example prompts:\n")
-                for prompt in category_prompts[category][:2]:  # Show first 2
-                    md.append(f"  - {prompt}\n")
-            md.append("\n")
+        listed.sort(key=lambda post: post.get('date') or '', reverse=True)
+        if output_file:
+            marks = {'new': '🆕 ', 'updated': '✏️ '}
+            with AtomicFile(output_file) as f:
+                f.write(f"# {self.profile.title} Posts\n\n")
+                f.write(f"*Generated: {datetime.now().strftime('%Y-%m-%d %H:%M:%S')}*\n\n")
+                f.write(f"*Total Articles: {len(listed)}*\n\n")
+                for post in listed:
+                    line = f"- {marks.get(post.get('status'), '')}{post.get('date') or 'undated'} — [{post['title']}]({post['url']})"
+                    if post.get('author'):
+                        line += f" — {post['author']}"
+                    f.write(line + "\n")
+            print(f"\n✓ Post listing saved to {output_file}")
+        for writer in writers:
+            print(f"✓ Records saved to {writer.path}")
+        print(f"✓ Listed {len(listed)} posts from their metadata")
+        if self.cache:
+            print(f"✓ {counts['new']} new, {counts['updated']} updated since the cached run")
+        return len(listed)
+
+    def enrich_post(self, post):
+        """Fetch, categorize and summarize a single post.
+
+        Returns a new dict combining `post` with its content and analysis, or None on failure.
+        """
+        post = dict(post)
+        analysis = None
+        if self.cache:
+            content, analysis = self.fetch_cached_post(post['url'])
+        else:
+            content = self.fetch_post_content(post['url'])
+        if not content:
+            return None
+        return self.analyze_post(post, content, analysis)
+
+    def analyze_post(self, post, content, analysis=None):
+        """Merge `content` into `post` and attach categories and summary, reusing a
+        cached `analysis` when one is given"""
+        post.update(content)
+        if analysis is None:
+            analysis = self.compute_analysis(post)
+            if self.cache:
+                self.cache.store_analysis(post['url'], analysis, self.analysis_key)
+        post.update(analysis)
+        return post
+
+    def compute_analysis(self, post):
+        """Category scores, categories and summary of a post that already has its content.
+
+        With an analysis memo, each stage is first looked up by a hash of its
+        normalized input and only computed on a miss.
+        """
+        def categorize():
+            scores = self.score_categories(post)
+            return {'categories': self.categorize_post(post, scores), 'category_scores': scores}
         
-        # Quick reference
-        md.append("\n### 📌 Quick Reference\n")
-        md.append(f"- **Total Knowledge Base Size**: ~{sum(len(posts) for posts in categorized_posts.values())} articles\n")
-        md.append(f"- **Coverage Areas**: {', '.join(sorted(categorized_posts.keys()))}\n")
-        md.append(f"- **Last Updated**: {datetime.now().strftime('%Y-%m-%d')}\n")
-        md.append("\n---\n")
-        md.append("\n*End of Knowledge Base*\n")
-        
-        return '\n'.join(md)
-    
-    def run(self, output_file='statsig_blog_summary.md', max_posts=None):
+        with self.metrics.timer('categorize'):
+            analysis = self.memoized('categorize', self.category_text(post), categorize)
+        self.metrics.incr('categorize.keyword_hits', sum(analysis['category_scores'].values()))
+        with self.metrics.timer('summarize'):
+            summary_text = (post.get('title', '') or '') + '\0' + normalize_text(post.get('text', '') or '')
+            analysis.update(self.memoized('summarize', summary_text, lambda: self.summarize_post(post)))
+        return analysis
+
+    def memoized(self, stage, text, compute):
+        """Result of `compute()` for an analysis stage whose output depends only on
+        `text` and the stage's rules, served from the analysis memo when possible"""
+        if not self.memo:
+            return compute()
+        rules = self.analysis_rules[stage]
+        digest = AnalysisMemo.digest(text)
+        result = self.memo.get(stage, rules, digest)
+        if result is not None:
+            self.metrics.incr('memo.hits')
+            return result
+        self.metrics.incr('memo.misses')
+        result = compute()
+        self.metrics.incr('memo.evicted', self.memo.put(stage, rules, digest, result))
+        return result
+
+    def iter_pooled(self, posts):
+        """Yield (post, enriched) pairs in `posts` order, downloading on threads and
+        parsing, categorizing and summarizing in `cpu_workers` processes.
+
+        Pages travel to the workers in batches of `cpu_batch_size`. Only a couple of
+        batches per worker are queued at a time, and downloads are pulled just ahead
+        of them, so raw HTML held in memory stays bounded however slow parsing is.
+        """
+        with ThreadPoolExecutor(max_workers=self.workers) as io_pool, \
+                ProcessPoolExecutor(max_workers=self.cpu_workers, initializer=_init_cpu_worker,
+                                    initargs=(self.parser, self.min_category_hits, self.memo_path,
+                                              self.memo_max_bytes, self.profile)) as cpu_pool:
+            urls = (post['url'] for post in posts)
+            downloads = bounded_map(io_pool, self.download_post, urls, self.workers * 2)
+            queue = deque()
+            for batch in batched(zip(posts, downloads), self.cpu_batch_size):
+                pages = [(post, downloaded[0]['html']) for post, downloaded in batch
+                         if downloaded and downloaded[0]]
+                queue.append((batch, cpu_pool.submit(_analyze_pages, pages) if pages else None))
+                if len(queue) > self.cpu_workers * 2:
+                    yield from self._finish_batch(*queue.popleft())
+            while queue:
+                yield from self._finish_batch(*queue.popleft())
+
+    def _finish_batch(self, batch, future):
+        """Merge a batch's worker results back into its posts and cache them"""
+        results = ()
+        if future:
+            results, snapshot = future.result()
+            self.metrics.merge(snapshot)
+        results = iter(results)
+        for post, downloaded in batch:
+            if downloaded is None:
+                yield post, None
+                continue
+            page, content, analysis = downloaded
+            if page is not None:
+                content, analysis = next(results)
+                if content is None:
+                    yield post, None
+                    continue
+                if self.cache:
+                    self.store_page(post['url'], page, content)
+                    self.cache.store_analysis(post['url'], analysis, self.analysis_key)
+            yield post, self.analyze_post(dict(post), content, analysis)
+
+    def iter_enriched_posts(self, posts, reuse_cached=False, resumed=None):
+        """Yield enriched posts in `posts` order; with `reuse_cached` every other post
+        in the cache follows, in index order, without a network request. Posts found in
+        `resumed` (enriched posts by URL, from a checkpoint) are not fetched again."""
+        resumed = resumed or {}
+        results = self._iter_fetched([post for post in posts if post['url'] not in resumed])
+        for i, post in enumerate(posts, 1):
+            if post['url'] in resumed:
+                enriched = resumed[post['url']]
+            else:
+                enriched = next(results)
+                print(f"Processing {i}/{len(posts)}: {post['title']}")
+            if enriched:
+                yield enriched
+        results.close()
+        if self.cache:
+            self.cache.store_positions([post['url'] for post in posts])
+        if reuse_cached:
+            fetched = {post['url'] for post in posts}
+            reused = 0
+            for url, content, analysis in self.cache.iter_cached(self.analysis_key, exclude=fetched,
+                                                                      prefix=self.cache_scope):
+                reused += 1
+                self.metrics.incr('cache.reused')
+                post = {'url': url, 'slug': urlparse(url).path, 'title': content.get('title', '')}
+                yield self.analyze_post(post, content, analysis)
+            print(f"Reused {reused} cached posts without fetching")
+
+    def _iter_fetched(self, posts):
+        """Enriched post, or None on failure, for each of `posts` in order"""
+        if self.cpu_workers:
+            for _, enriched in self.iter_pooled(posts):
+                yield enriched
+        else:
+            # The rate limiter keeps us polite towards the server; bounded_map yields
+            # results in input order, so the output does not depend on which request
+            # finishes first, and only keeps a window of posts ahead of the consumer.
+            with ThreadPoolExecutor(max_workers=self.workers) as executor:
+                yield from bounded_map(executor, self.enrich_post, posts, self.workers * 2)
+
+    def crawl(self, max_posts=None):
+        """Discover and enrich posts without writing any output; returns the enriched posts"""
+        posts = self.discover_posts()
+        return self.summarize_corpus(list(self.iter_enriched_posts(posts[:max_posts] if max_posts else posts)))
+
+    def run(self, output_file='statsig_blog_summary.md', max_posts=None, formats=('markdown',),
+            request_report=None, search_index=None, shard_dir=None, shard_budget=100000, shard_unit='tokens',
+            prometheus=None, checkpoint_every=0, resume=False):
+        """Main execution function; returns the number of posts processed.
+
+        With `checkpoint_every`, progress is logged to <output>.checkpoint.jsonl and
+        `resume` continues an interrupted run from that log.
+        """
+        print(f"Starting {self.profile.title} scraper...")
+        run_start = time.perf_counter()
+        self.metrics.log('run_start', base_url=self.base_url, discovery=self.discovery, formats=list(formats))
+        
+        checkpoint = self.open_checkpoint(output_file, checkpoint_every, resume)
+        if checkpoint and checkpoint.posts is not None:
+            posts = checkpoint.posts
+        else:
+            # Find posts; incremental runs only look for posts missing from the cache
+            known = self.cache.known_urls(self.cache_scope) if self.incremental else None
+            with self.metrics.timer('discovery'):
+                posts = self.discover_posts(known)
+        self.metrics.log('discovery', posts=len(posts))
+        
+        if max_posts:
+            posts = posts[:max_posts]
+        
+        if self.metadata == 'only':
+            processed = self.write_metadata_listing(posts, output_file if 'markdown' in formats else None,
+                                                    RunOutputs.open_writers(output_file, formats))
+            self.report_run(run_start, processed, request_report, prometheus)
+            return processed
+        
+        outputs = RunOutputs(self, output_file, formats, search_index, shard_dir, shard_budget, shard_unit)
+        enriched_posts = self.iter_enriched_posts(posts, reuse_cached=self.incremental,
+                                                  resumed=checkpoint and checkpoint.resumed)
+        if checkpoint:
+            checkpoint.start(posts)
+            enriched_posts = checkpoint.track(enriched_posts)
+        try:
+            if self.corpus_summarizer:
+                # Corpus-level summaries need every post's sentences before any post can be scored
+                enriched_posts = self.summarize_corpus(list(enriched_posts))
+            for enriched in enriched_posts:
+                outputs.add(enriched)
+            processed = outputs.close()
+        except BaseException:
+            outputs.discard()
+            raise
+        if checkpoint:
+            checkpoint.complete()
+        self.report_run(run_start, processed, request_report, prometheus)
+        return processed
+
+    def open_checkpoint(self, output_file, interval, resume=False):
+        """Checkpoint of a run writing `output_file`, loaded from disk when resuming;
+        None when checkpointing is off"""
+        if resume and not interval:
+            raise ValueError("resuming needs checkpointing (checkpoint_every)")
+        if not interval or self.metadata == 'only':
+            return None
+        checkpoint = Checkpoint(os.path.splitext(output_file)[0] + '.checkpoint.jsonl', interval)
+        if resume:
+            if checkpoint.load():
+                print(f"Resuming from {checkpoint.path}: {len(checkpoint.resumed)} of "
+                      f"{len(checkpoint.posts)} posts already processed")
+            else:
+                print(f"No checkpoint at {checkpoint.path}; starting from the beginning")
+        return checkpoint
+
+    def report_run(self, run_start, processed, request_report=None, prometheus=None):
+        """Print the request, cache and timing summary of a run and write its reports"""
+        # A shared transport also carries other sites' requests
+        hosts = self.profile.hosts if self.shared_transport else None
+        report = self.transport.report(hosts)
+        if self.shared_transport:
+            # Response bytes are counted by the scheduler's metrics; attribute this site's share
+            self.metrics.incr('http.bytes', report['bytes'])
+        print(f"✓ Requests: {report['requests']} ({report['attempts']} attempts), "
+              f"{len(report['retried'])} retried, {len(report['failed'])} failed")
+        for url, entry in report['failed'].items():
+            print(f"  ✗ {url}: {entry['error']} after {entry['attempts']} attempt(s)")
+        if request_report:
+            with AtomicFile(request_report) as f:
+                json.dump({'summary': {key: report[key] for key in ('requests', 'attempts')},
+                           'requests': self.transport.requests_to(hosts)}, f, indent=2)
+        if self.cache:
+            stats = self.cache.stats
+            print(f"✓ Cache{' (all sites so far)' if self.cache_scope else ''}: {stats['not_modified']} not modified, "
+                  f"{stats['unchanged']} unchanged, {stats['fetched']} fetched"
+                  + (f", {stats['metadata_unchanged']} skipped by metadata" if self.metadata == 'first' else ''))
+            for event, count in stats.items():
+                self.metrics.counters[f'cache.{event}'] = count
+        if self.memo:
+            self.metrics.incr('memo.evicted', self.memo.flush())
+            counters = self.metrics.counters
+            print(f"✓ Analysis memo: {counters['memo.hits']} hits, {counters['memo.misses']} misses, "
+                  f"{counters['memo.evicted']} evicted")
+        
+        self.metrics.observe('run', time.perf_counter() - run_start)
+        self.metrics.incr('posts.processed', processed)
+        snapshot = self.metrics.snapshot()
+        timers = snapshot['timers']
+        print("✓ Time: " + ', '.join(f"{stage} {timers[stage]['total_s']:.2f}s"
+                                     for stage in ('run', 'discovery', 'http.request', 'parse', 'categorize',
+                                                   'summarize', 'summarize.corpus', 'render') if stage in timers)
+              + f"; {snapshot['counters'].get('http.bytes', 0) / 1e6:.1f} MB downloaded")
+        self.metrics.log('run', **snapshot)
+        if prometheus:
+            self.metrics.write_prometheus(prometheus)
+        self.metrics.close()
+
+
+class AsyncStatsigBlogScraper(StatsigBlogScraper):
+    """asyncio flavour of StatsigBlogScraper, for running the crawl inside an existing
+    event loop.
+
+    All requests share one httpx.AsyncClient; at most `workers` of them are in flight,
+    and `request_timeout` caps each one, retries included. Parsing and analysis run in
+    worker threads so they never stall the loop. `crawl` returns the same enriched
+    posts, in the same order, as the sync scraper.
+
+    Use it as an async context manager, or await `close()`, to release the client.
+    The cache, sitemap/feed discovery, metadata probes and CPU worker processes are
+    sync-only for now.
+    """
+    transport_class = AsyncHttpTransport
+
+    def __init__(self, *args, request_timeout=None, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.request_timeout = request_timeout
+        if self.cache or self.discovery != 'index' or self.metadata or self.cpu_workers:
+            if self.cache:
+                self.cache.close()
+            raise ValueError("The async crawler supports neither the cache, sitemap/feed discovery, "
+                             "metadata probes nor CPU worker processes")
+
+    async def __aenter__(self):
+        return self
+
+    async def __aexit__(self, *exc_info):
+        await self.close()
+
+    async def close(self):
+        await self.transport.close()
+
+    async def discover_posts(self, known=None):
+        return await self.fetch_all_posts(known)
+
+    async def fetch_all_posts(self, known=None):
+        """Fetch all blog post links from the site's index pages, following rel="next" pagination"""
+        print("Fetching blog post list...")
+        posts = []
+        seen_urls = set()
+        visited_pages = set()
+        for url in self.index_urls():
+            while url and url not in visited_pages and len(visited_pages) < self.max_index_pages:
+                visited_pages.add(url)
+                response = await self.transport.get(url, timeout=self.request_timeout)
+                page_posts, next_url = await asyncio.to_thread(self.parse_index_page, response.content, url,
+                                                               seen_urls)
+                posts.extend(page_posts)
+                if known is not None and not any(post['url'] not in known for post in page_posts):
+                    break
+                url = next_url
+        
+        return self.report_discovered(posts, known)
+
+    async def fetch_post_content(self, post_url):
+        """Fetch individual blog post content"""
+        try:
+            response = await self.transport.get(post_url, timeout=self.request_timeout)
+            return await asyncio.to_thread(self.parse_post_content, response.content)
+        except Exception as e:
+            print(f"Error fetching {post_url}: {e}")
+            return None
+
+    async def enrich_post(self, post):
+        """Fetch, categorize and summarize a single post; None on failure"""
+        post = dict(post)
+        content = await self.fetch_post_content(post['url'])
+        if not content:
+            return None
+        return await asyncio.to_thread(self.analyze_post, post, content)
+
+    async def iter_enriched_posts(self, posts, resumed=None):
+        """Yield enriched posts in `posts` order. Downloads run up to two windows of
+        `workers` ahead of the consumer; closing the generator cancels them. Posts
+        found in `resumed` (enriched posts by URL) are not fetched again."""
+        resumed = resumed or {}
+        window = 2 * self.workers
+        pending = deque()
+        try:
+            for i, post in enumerate(posts, 1):
+                if post['url'] in resumed:
+                    task = None
+                else:
+                    task = asyncio.ensure_future(self.enrich_post(post))
+                pending.append((i, post, task))
+                if len(pending) >= window:
+                    if enriched := await self._next_enriched(pending, len(posts), resumed):
+                        yield enriched
+            while pending:
+                if enriched := await self._next_enriched(pending, len(posts), resumed):
+                    yield enriched
+        finally:
+            tasks = [task for _, _, task in pending if task]
+            for task in tasks:
+                task.cancel()
+            await asyncio.gather(*tasks, return_exceptions=True)
+
+    async def _next_enriched(self, pending, total, resumed):
+        i, post, task = pending[0]
+        if task is None:
+            pending.popleft()
+            return resumed[post['url']]
+        enriched = await task
+        pending.popleft()
+        print(f"Processing {i}/{total}: {post['title']}")
+        return enriched
+
+    async def crawl(self, max_posts=None):
+        """Discover and enrich posts without writing any output; returns the enriched posts"""
+        posts = await self.discover_posts()
+        enriched = [enriched async for enriched in self.iter_enriched_posts(posts[:max_posts] if max_posts else posts)]
+        return await asyncio.to_thread(self.summarize_corpus, enriched)
+
+    async def run(self, output_file='statsig_blog_summary.md', max_posts=None, formats=('markdown',),
+                  request_report=None, search_index=None, shard_dir=None, shard_budget=100000, shard_unit='tokens',
+                  prometheus=None, checkpoint_every=0, resume=False):
         """Main execution function"""
-        print("Starting Statsig blog scraper...")
+        print(f"Starting {self.profile.title} scraper...")
+        run_start = time.perf_counter()
+        self.metrics.log('run_start', base_url=self.base_url, discovery=self.discovery, formats=list(formats))
         
-        # Fetch all posts
-        posts = self.fetch_all_posts()
+        checkpoint = self.open_checkpoint(output_file, checkpoint_every, resume)
+        if checkpoint and checkpoint.posts is not None:
+            posts = checkpoint.posts
+        else:
+            with self.metrics.timer('discovery'):
+                posts = await self.discover_posts()
+        self.metrics.log('discovery', posts=len(posts))
         
         if max_posts:
             posts = posts[:max_posts]
         
-        # Fetch content for each post
-        enriched_posts = []
-        for i, post in enumerate(posts, 1):
-            print(f"Processing {i}/{len(posts)}: {post['title']}")
-            content = self.fetch_post_content(post['url'])
-            if content:
-                post.update(content)
-                categories = self.categorize_post(post)
-                post['categories'] = categories
-                summary_data = self.summarize_post(post)
-                post.update(summary_data)
-                enriched_posts.append(post)
-            time.sleep(0.5)  # Be respectful to the server
-        
-        # Categorize posts
-        categorized = defaultdict(list)
-        for post in enriched_posts:
-            for category in post['categories']:
-                categorized[category].append(post)
-        
-        # Generate markdown
-        markdown = self.generate_markdown(categorized)
-        
-        # Write to file
-        with open(output_file, 'w', encoding='utf-8') as f:
-            f.write(markdown)
-        
-        print(f"\n✓ Summary saved to {output_file}")
-        print(f"✓ Processed {len(enriched_posts)} posts")
-        print(f"✓ Found {len(categorized)} categories")
+        # Outputs are written one post at a time off the loop, in order, while later downloads continue
+        outputs = await asyncio.to_thread(RunOutputs, self, output_file, formats, search_index, shard_dir,
+                                          shard_budget, shard_unit)
+        try:
+            if checkpoint:
+                await asyncio.to_thread(checkpoint.start, posts)
+            collected = []
+            async for enriched in self.iter_enriched_posts(posts, checkpoint and checkpoint.resumed):
+                if checkpoint:
+                    await asyncio.to_thread(checkpoint.record, enriched)
+                if self.corpus_summarizer:
+                    collected.append(enriched)
+                else:
+                    await asyncio.to_thread(outputs.add, enriched)
+            if self.corpus_summarizer:
+                for enriched in await asyncio.to_thread(self.summarize_corpus, collected):
+                    await asyncio.to_thread(outputs.add, enriched)
+            processed = await asyncio.to_thread(outputs.close)
+        except BaseException:
+            outputs.discard()
+            raise
+        if checkpoint:
+            checkpoint.complete()
+        self.report_run(run_start, processed, request_report, prometheus)
+        return processed
+
+
+class SiteScheduler:
+    """Crawls several blogs in one process, one StatsigBlogScraper per SiteProfile.
+
+    All sites are crawled at the same time, so the wall time is that of the slowest
+    site rather than the sum of all of them. Their scrapers share one HTTP transport
+    (connection pool and retries), the per-host rate limiter, the post cache and the
+    analysis memo. A HostScheduler allows each host `workers` requests in flight and,
+    with `max_connections`, hands free connections to the hosts in turn. A profile's
+    `workers`, `requests_per_second` and `discovery` override the shared settings
+    for its site; `options` are passed on to every scraper.
+    """
+
+    def __init__(self, profiles, workers=4, requests_per_second=2.0, max_connections=None, cache_path=None,
+                 memo_path=None, memo_max_bytes=None, connect_timeout=10.0, read_timeout=30.0, retries=3,
+                 backoff=0.5, http2=False, metrics_log=None, otel=False, discovery='index', **options):
+        if not profiles:
+            raise ValueError("No site profiles to crawl")
+        tracer = otel_trace.get_tracer('statsig_blog_scraper') if otel and otel_trace else None
+        self.metrics = Metrics(metrics_log, tracer)
+        self.rate_limiter = RateLimiter(requests_per_second)
+        self.host_scheduler = HostScheduler(workers, max_connections)
+        hosts = set()
+        for profile in profiles:
+            for host in profile.hosts:
+                hosts.add(host)
+                if profile.requests_per_second is not None:
+                    self.rate_limiter.rates[host] = profile.requests_per_second
+                if profile.workers:
+                    self.host_scheduler.limits[host] = profile.workers
+        self.transport = HttpTransport(
+            headers=REQUEST_HEADERS, pool_size=max_connections or max(1, workers) * len(hosts),
+            connect_timeout=connect_timeout, read_timeout=read_timeout, retries=retries, backoff=backoff,
+            rate_limiter=self.rate_limiter, http2=http2, metrics=self.metrics, host_scheduler=self.host_scheduler)
+        self.cache = PostCache(cache_path) if cache_path else None
+        self.memo = AnalysisMemo(memo_path, memo_max_bytes or 64 * 1024 * 1024) if memo_path else None
+        self.scrapers = [StatsigBlogScraper(profile=profile, workers=profile.workers or workers,
+                                            discovery=profile.discovery or discovery, transport=self.transport,
+                                            cache=self.cache, memo=self.memo, **options)
+                         for profile in profiles]
+
+    def run(self, output_dir='blog_summaries', max_posts=None, formats=('markdown',), shard_budget=100000,
+            shard_unit='tokens', checkpoint_every=0, resume=False, request_report=None, prometheus=None):
+        """Crawl every site, writing its outputs to <output_dir>/<name>.md and, for the
+        other formats, next to it. A site that fails is reported without stopping the
+        others. Returns the number of posts processed per site name."""
+        os.makedirs(output_dir, exist_ok=True)
+        run_start = time.perf_counter()
+        print(f"Crawling {len(self.scrapers)} sites: {', '.join(s.profile.name for s in self.scrapers)}")
+        self.metrics.log('run_start', sites=[scraper.profile.name for scraper in self.scrapers],
+                         formats=list(formats))
+        
+        def run_site(scraper):
+            start = time.perf_counter()
+            processed = scraper.run(os.path.join(output_dir, f"{scraper.profile.name}.md"), max_posts, formats,
+                                    shard_budget=shard_budget, shard_unit=shard_unit,
+                                    checkpoint_every=checkpoint_every, resume=resume)
+            return processed, time.perf_counter() - start
+        
+        with ThreadPoolExecutor(max_workers=len(self.scrapers)) as executor:
+            futures = [(scraper.profile.name, executor.submit(run_site, scraper)) for scraper in self.scrapers]
+        
+        print(f"\n✓ Sites crawled in {time.perf_counter() - run_start:.2f}s:")
+        results = {}
+        for name, future in futures:
+            try:
+                processed, seconds = future.result()
+            except Exception as e:
+                print(f"  ✗ {name}: {e}")
+                self.metrics.incr('sites.failed')
+                continue
+            results[name] = processed
+            print(f"  ✓ {name}: {processed} posts in {seconds:.2f}s")
+        
+        report = self.transport.report()
+        print(f"✓ Requests: {report['requests']} ({report['attempts']} attempts), "
+              f"{len(report['retried'])} retried, {len(report['failed'])} failed")
+        if request_report:
+            with AtomicFile(request_report) as f:
+                json.dump({'summary': {key: report[key] for key in ('requests', 'attempts')},
+                           'requests': self.transport.requests}, f, indent=2)
+        self.metrics.observe('run', time.perf_counter() - run_start)
+        self.metrics.incr('posts.processed', sum(results.values()))
+        self.metrics.log('run', **self.metrics.snapshot())
+        if prometheus:
+            self.metrics.write_prometheus(prometheus)
+        return results
+
+    def close(self):
+        self.transport.close()
+        if self.cache:
+            self.cache.close()
+        if self.memo:
+            self.memo.close()
 
 
 if __name__ == '__main__':
     import argparse
     
+    if sys.argv[1:2] == ['search']:
+        search_parser = argparse.ArgumentParser(prog=f"{os.path.basename(sys.argv[0])} search",
+                                                description='Search the full-text index built with --index')
+        search_parser.add_argument('query', nargs='+', help='Search terms (FTS5 syntax: "exact phrase", OR, NOT, prefix*)')
+        search_parser.add_argument('--index', metavar='PATH', default='statsig_blog_index.sqlite',
+                                   help='Search index to query (default: statsig_blog_index.sqlite)')
+        search_parser.add_argument('-n', '--limit', type=int, default=10, help='Number of results (default: 10)')
+        search_parser.add_argument('--json', action='store_true', help='Print results as JSON')
+        search_args = search_parser.parse_args(sys.argv[2:])
+        if not ' '.join(search_args.query).strip():
+            search_parser.error("empty query")
+        if not os.path.exists(search_args.index):
+            search_parser.error(f"no search index at {search_args.index}; build one with --index")
+        
+        search_index = SearchIndex(search_args.index)
+        start = time.perf_counter()
+        results = search_index.search(' '.join(search_args.query), search_args.limit)
+        elapsed = time.perf_counter() - start
+        if search_args.json:
+            print(json.dumps(results, indent=2, ensure_ascii=False))
+        else:
+            for rank, result in enumerate(results, 1):
+                print(f"{rank}. {result['title']} ({result['date'] or 'undated'}) [{result['score']:.3g}]")
+                print(f"   {result['url']}")
+                print(f"   {', '.join(result['categories'])}")
+                print(f"   {result['snippet']}\n")
+            print(f"{len(results)} results from {search_index.count()} posts in {elapsed * 1000:.1f} ms")
+        search_index.close()
+        sys.exit(0)
+    
     parser = argparse.ArgumentParser(description='Scrape and summarize Statsig blog posts')
     parser.add_argument('-o', '--output', default='statsig_blog_summary.md', help='Output markdown file')
     parser.add_argument('-m', '--max-posts', type=int, help='Maximum number of posts to process')
+    parser.add_argument('-w', '--workers', type=int, default=4, help='Number of concurrent fetch workers (default: 4)')
+    parser.add_argument('--cpu-workers', type=int, default=0,
+                        help='Processes that parse, categorize and summarize pages; 0 does it in the '
+                             'fetch threads (default: 0)')
+    parser.add_argument('--cpu-batch-size', type=int, default=8,
+                        help='Pages sent to a CPU worker at a time (default: 8)')
+    parser.add_argument('--rate', type=float, default=2.0,
+                        help='Maximum requests per second per host, 0 to disable (default: 2.0)')
+    parser.add_argument('--cache', metavar='PATH',
+                        help='SQLite cache of fetched posts; re-runs only re-process changed posts')
+    parser.add_argument('--parser', choices=PARSER_BACKENDS, default='html.parser',
+                        help='BeautifulSoup tree builder; lxml is considerably faster (default: html.parser)')
+    parser.add_argument('--stream', action='store_true',
+                        help='Spool enriched posts to disk so memory stays flat on large crawls')
+    parser.add_argument('--render-workers', type=int, default=1,
+                        help='Threads rendering markdown categories into separate buffers (default: 1)')
+    parser.add_argument('-f', '--format', dest='formats', action='append', choices=OUTPUT_FORMATS,
+                        help='Output format, repeatable (default: markdown). Structured formats reuse the '
+                             '--output name with their own extension')
+    parser.add_argument('--shard-dir', metavar='DIR',
+                        help='Directory for -f shards (default: the --output name with a _shards suffix)')
+    parser.add_argument('--shard-budget', type=int, default=100000,
+                        help='Maximum size of one shard in --shard-unit (default: 100000)')
+    parser.add_argument('--shard-unit', choices=SHARD_UNITS, default='tokens',
+                        help='Shard budget unit; tokens are estimated at 4 characters each (default: tokens)')
+    parser.add_argument('--metadata', choices=METADATA_MODES,
+                        help='"only": list posts from their JSON-LD metadata without downloading or parsing full '
+                             'pages; "first": read the metadata of cached posts first and fully fetch only '
+                             'new or changed posts (requires --cache)')
+    parser.add_argument('--dedup', choices=DEDUP_MODES,
+                        help='Detect near-duplicate posts (MinHash-LSH over the post text) and flag them, '
+                             'or collapse them into the first post of their cluster')
+    parser.add_argument('--dedup-threshold', type=float, default=0.8,
+                        help='Estimated Jaccard similarity at which posts count as near-duplicates (default: 0.8)')
+    parser.add_argument('--discovery', choices=DISCOVERY_METHODS, default='index',
+                        help='Where to find posts: the /blog/all index, sitemap.xml or an RSS/Atom feed')
+    parser.add_argument('--discovery-url', metavar='URL',
+                        help='Index, sitemap or feed URL (default: /blog/all, /sitemap.xml, /blog/rss.xml)')
+    parser.add_argument('--incremental', action='store_true',
+                        help='Only fetch posts that are new (or updated, per sitemap/feed dates) since the '
+                             'cached run and reuse the cache for the rest; requires --cache')
+    parser.add_argument('--timeout', type=float, default=30.0, help='Read timeout in seconds (default: 30)')
+    parser.add_argument('--connect-timeout', type=float, default=10.0,
+                        help='Connect timeout in seconds (default: 10)')
+    parser.add_argument('--retries', type=int, default=3,
+                        help='Retries for connection errors, timeouts, 429 and 5xx (default: 3)')
+    parser.add_argument('--backoff', type=float, default=0.5,
+                        help='Base delay in seconds for exponential backoff with jitter (default: 0.5)')
+    parser.add_argument('--pool-size', type=int, help='HTTP connection pool size (default: --workers)')
+    parser.add_argument('--http2', action='store_true', help="Use HTTP/2 via httpx (pip install 'httpx[http2]')")
+    parser.add_argument('--async', dest='use_async', action='store_true',
+                        help='Crawl with asyncio on a single httpx client; --workers bounds the requests '
+                             'in flight (pip install httpx)')
+    parser.add_argument('--index', metavar='PATH',
+                        help='Build or update a full-text search index (SQLite FTS5) of the posts; '
+                             'query it with the "search" subcommand')
+    parser.add_argument('--request-report', metavar='PATH', help='Write per-request attempts and failures as JSON')
+    parser.add_argument('--metrics-log', metavar='PATH',
+                        help='Append structured JSON log lines (per request and per run, with stage timings '
+                             'and counters) to this file')
+    parser.add_argument('--prometheus', metavar='PATH',
+                        help='Write run metrics in the Prometheus textfile collector format')
+    parser.add_argument('--otel', action='store_true',
+                        help='Emit OpenTelemetry spans for each stage (pip install opentelemetry-api)')
+    parser.add_argument('--profile', metavar='PATH',
+                        help='Profile the run: cProfile stats (.pstats) or, with --profile-mode sample, '
+                             'folded stacks for flamegraph.pl/speedscope')
+    parser.add_argument('--profile-mode', choices=('cprofile', 'sample'), default='cprofile',
+                        help='Deterministic cProfile or a low-overhead stack sampler (default: cprofile)')
+    parser.add_argument('--memo', metavar='PATH',
+                        help='SQLite memo of categorize/summarize results keyed by a hash of the post text '
+                             'and the rules; unchanged text skips analysis even when the page changed')
+    parser.add_argument('--memo-size', type=float, default=64,
+                        help='Size limit of the analysis memo in MB; least recently used entries are '
+                             'evicted (default: 64)')
+    parser.add_argument('--summarizer', choices=SUMMARIZERS, default='heuristic',
+                        help='Summary and key points: the first-sentences heuristic, or extractive scoring fitted '
+                             'over the whole corpus by TF-IDF centrality or TextRank (pip install numpy scipy)')
+    parser.add_argument('--related', type=int, default=0, metavar='K',
+                        help='Add a "See also" list of the K most similar posts (TF-IDF cosine) to every post and '
+                             'write the graph to <output>_related.json (pip install numpy scipy)')
+    parser.add_argument('--related-store', metavar='PATH',
+                        help='SQLite file keeping post vectors and neighbour lists between runs, so only new or '
+                             'changed posts are scored')
+    parser.add_argument('--checkpoint-every', type=int, default=25, metavar='N',
+                        help='Log progress to <output>.checkpoint.jsonl, forcing it to disk every N posts '
+                             '(default: 25, 0 disables)')
+    parser.add_argument('--resume', action='store_true',
+                        help='Continue an interrupted run from its checkpoint instead of starting over')
+    parser.add_argument('--sites', metavar='PATH',
+                        help='Crawl every blog described in a JSON file of site profiles at once, writing '
+                             '<output-dir>/<name>.md per site')
+    parser.add_argument('--output-dir', default='blog_summaries',
+                        help='Directory for --sites outputs (default: blog_summaries)')
+    parser.add_argument('--max-connections', type=int, metavar='N',
+                        help='With --sites, requests in flight across all hosts (default: --workers per host)')
+    parser.add_argument('--min-category-hits', type=int, default=1,
+                        help='Keyword hits a post needs before it is filed under a category (default: 1)')
     
     args = parser.parse_args()
     
-    scraper = StatsigBlogScraper()
-    scraper.run(output_file=args.output, max_posts=args.max_posts)
+    try:
+        BeautifulSoup('', args.parser)
+    except FeatureNotFound:
+        parser.error(f"parser backend {args.parser!r} is not installed (pip install {args.parser})")
+    if args.incremental and not args.cache:
+        parser.error("--incremental requires --cache")
+    if args.metadata == 'first' and not args.cache:
+        parser.error("--metadata first requires --cache")
+    if args.otel and otel_trace is None:
+        parser.error("--otel requires opentelemetry-api (pip install opentelemetry-api)")
+    if args.summarizer != 'heuristic' and np is None:
+        parser.error(f"--summarizer {args.summarizer} requires numpy and scipy (pip install numpy scipy)")
+    if args.related and np is None:
+        parser.error("--related requires numpy and scipy (pip install numpy scipy)")
+    if args.related_store and not args.related:
+        parser.error("--related-store requires --related K")
+    if args.resume and not args.checkpoint_every:
+        parser.error("--resume requires checkpointing (--checkpoint-every N)")
+    if args.http2 and httpx is None:
+        parser.error("--http2 requires httpx (pip install 'httpx[http2]')")
+    formats = args.formats or ['markdown']
+    if pa is None and ({'parquet', 'arrow'} & set(formats)):
+        parser.error("Parquet/Arrow output requires pyarrow (pip install pyarrow)")
+    
+    if args.use_async and httpx is None:
+        parser.error("--async requires httpx (pip install httpx)")
+    if args.use_async and (args.cache or args.discovery != 'index' or args.metadata or args.cpu_workers):
+        parser.error("--async cannot be combined with --cache, --discovery sitemap/feed, --metadata or --cpu-workers")
+    if args.sites:
+        if args.use_async or args.discovery_url or args.index or args.related_store or args.pool_size or args.shard_dir:
+            parser.error("--sites cannot be combined with --async, --discovery-url, --index, --related-store, "
+                         "--pool-size or --shard-dir")
+        try:
+            profiles = load_site_profiles(args.sites)
+        except (OSError, ValueError) as e:
+            parser.error(f"cannot load site profiles: {e}")
+    elif args.max_connections:
+        parser.error("--max-connections requires --sites")
+    
+    scraper_options = dict(workers=args.workers, requests_per_second=args.rate,
+                           cache_path=args.cache, parser=args.parser,
+                           min_category_hits=args.min_category_hits, stream=args.stream,
+                           connect_timeout=args.connect_timeout, read_timeout=args.timeout,
+                           retries=args.retries, backoff=args.backoff, http2=args.http2,
+                           discovery=args.discovery, incremental=args.incremental,
+                           cpu_workers=args.cpu_workers, cpu_batch_size=args.cpu_batch_size,
+                           dedup=args.dedup, dedup_threshold=args.dedup_threshold,
+                           metrics_log=args.metrics_log, otel=args.otel, metadata=args.metadata,
+                           memo_path=args.memo, memo_max_bytes=int(args.memo_size * 1024 * 1024),
+                           render_workers=args.render_workers, summarizer=args.summarizer, related=args.related)
+    run_options = dict(max_posts=args.max_posts, formats=formats, request_report=args.request_report,
+                       shard_budget=args.shard_budget, shard_unit=args.shard_unit, prometheus=args.prometheus,
+                       checkpoint_every=args.checkpoint_every, resume=args.resume)
+    if args.sites:
+        scraper = SiteScheduler(profiles, max_connections=args.max_connections, **scraper_options)
+        run_options.update(output_dir=args.output_dir)
+    else:
+        scraper_class = AsyncStatsigBlogScraper if args.use_async else StatsigBlogScraper
+        scraper = scraper_class(pool_size=args.pool_size, discovery_url=args.discovery_url,
+                                related_path=args.related_store, **scraper_options)
+        run_options.update(output_file=args.output, search_index=args.index, shard_dir=args.shard_dir)
+    
+    async def run_async():
+        async with scraper:
+            await scraper.run(**run_options)
+    
+    def run():
+        if args.use_async:
+            asyncio.run(run_async())
+        elif args.sites:
+            try:
+                scraper.run(**run_options)
+            finally:
+                scraper.close()
+        else:
+            scraper.run(**run_options)
+    
+    if not args.profile:
+        run()
+    elif args.profile_mode == 'sample':
+        sampler = StackSampler()
+        sampler.start()
+        try:
+            run()
+        finally:
+            sampler.stop(args.profile)
+        print(f"✓ Folded stacks saved to {args.profile} (flamegraph.pl {args.profile} > flame.svg)")
+    else:
+        import cProfile
+        profiler = cProfile.Profile()
+        try:
+            profiler.runcall(run)
+        finally:
+            profiler.dump_stats(args.profile)
+        print(f"✓ Profile saved to {args.profile} (python -m pstats {args.profile}, or snakeviz/flameprof)")
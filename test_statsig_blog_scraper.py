@@ -0,0 +1,128 @@
+"""Offline regression tests for statsig_blog_scraper; run with `python -m pytest`"""
+
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime
+
+import pytest
+
+import statsig_blog_scraper as scraper_module
+from statsig_blog_scraper import Checkpoint, KeywordMatcher, PostRecord, PostSpool, RunOutputs, StatsigBlogScraper
+
+
+class FixedDatetime(datetime):
+    @classmethod
+    def now(cls, tz=None):
+        return cls(2025, 1, 2, 3, 4, 5)
+
+
+def enriched_posts(count=200):
+    categories = list(scraper_module.CATEGORY_KEYWORDS)
+    for i in range(count):
+        yield {
+            'url': f"https://example.com/blog/post-{i}",
+            'slug': f"/blog/post-{i}",
+            'title': f"Post {i}",
+            'date': '2025-01-01',
+            'author': 'Author',
+            'categories': [categories[i % len(categories)], categories[(i * 7) % len(categories)]],
+            'category_scores': {},
+            'summary': f"Summary of post {i}. " * (i % 40 + 1),
+            'key_points': [f"Point {i}.{j}" for j in range(i % 5)],
+            'takeaways': [f"Takeaway {i}"],
+        }
+
+
+def render(tmp_path, name, **options):
+    scraper = StatsigBlogScraper(**options)
+    output_file = str(tmp_path / name)
+    outputs = RunOutputs(scraper, output_file)
+    for post in enriched_posts():
+        outputs.add(post)
+    outputs.close()
+    with open(output_file, encoding='utf-8') as f:
+        return f.read()
+
+
+def test_stream_mode_renders_categories_on_several_threads(tmp_path, monkeypatch):
+    monkeypatch.setattr(scraper_module, 'datetime', FixedDatetime)
+    expected = render(tmp_path, 'serial.md')
+    for attempt in range(5):
+        assert render(tmp_path, f"stream-{attempt}.md", stream=True, render_workers=8) == expected
+
+
+def test_failed_run_leaves_no_temporary_outputs(tmp_path):
+    (tmp_path / 'out.jsonl').write_text('previous\n', encoding='utf-8')
+    outputs = RunOutputs(StatsigBlogScraper(stream=True), str(tmp_path / 'out.md'), formats=('markdown', 'jsonl'))
+    with pytest.raises(RuntimeError):
+        try:
+            for post in enriched_posts(10):
+                outputs.add(post)
+            raise RuntimeError('crash')
+        except BaseException:
+            outputs.discard()
+            raise
+    assert sorted(path.name for path in tmp_path.iterdir()) == ['out.jsonl']
+    assert (tmp_path / 'out.jsonl').read_text(encoding='utf-8') == 'previous\n'
+
+
+def test_post_spool_reads_from_several_threads():
+    spool = PostSpool()
+    for i in range(500):
+        spool.append(PostRecord(f"https://example.com/blog/post-{i}", summary='x' * (i * 37 % 3000)))
+
+    def read(start):
+        return [post.url for post in spool.posts(range(start, 500))]
+
+    with ThreadPoolExecutor(max_workers=8) as executor:
+        results = list(executor.map(read, range(8)))
+    spool.close()
+    for start, urls in enumerate(results):
+        assert urls == [f"https://example.com/blog/post-{i}" for i in range(start, 500)]
+
+
+def test_keyword_matcher_counts_a_category_once_per_match():
+    matcher = KeywordMatcher(scraper_module.CATEGORY_KEYWORDS)
+    assert matcher.count('ai-generated content') == {'AI & Machine Learning': 1}
+    assert matcher.count('a data pipeline') == {'Product Analytics': 1, 'Data Engineering': 1}
+
+
+def test_keyword_matcher_inflections():
+    matcher = KeywordMatcher({'Release': ['release'], 'Control': ['control'], 'AI': ['llm']})
+    for text in ('release', 'releases', 'released', 'releasing'):
+        assert matcher.count(text) == {'Release': 1}, text
+    for text in ('control', 'controls', 'controlled', 'controlling'):
+        assert matcher.count(text) == {'Control': 1}, text
+    for text in ('llm', 'llms'):
+        assert matcher.count(text) == {'AI': 1}, text
+    for text in ('releaser', 'controller', 'llmops', 'releas'):
+        assert matcher.count(text) == {}, text
+
+
+def test_checkpoint_resumes_posts_from_the_log(tmp_path):
+    path = str(tmp_path / 'run.checkpoint')
+    posts = [{'url': f"https://example.com/blog/post-{i}"} for i in range(5)]
+    enriched = {post['url']: dict(post, title=f"Pöst {i}", summary='…' * i) for i, post in enumerate(posts)}
+    checkpoint = Checkpoint(path, interval=1)
+    checkpoint.start(posts)
+    for post in posts[:3]:
+        checkpoint.record(enriched[post['url']])
+    checkpoint._file.close()
+    with open(path, 'a', encoding='utf-8') as f:
+        f.write('{"url": "torn')
+
+    resumed = Checkpoint(path)
+    assert resumed.load()
+    assert resumed.posts == posts
+    assert list(resumed.resumed) == [post['url'] for post in posts[:3]]
+    resumed.start(posts)
+    for post in posts:
+        if post['url'] in resumed.resumed:
+            assert resumed.resumed[post['url']] == enriched[post['url']]
+        resumed.record(enriched[post['url']])
+    resumed._file.flush()
+
+    again = Checkpoint(path)
+    assert again.load()
+    assert {url: again.resumed[url] for url in again.resumed} == enriched
+    again.resumed.close()
+    resumed.complete()